@@ -7,13 +7,15 @@
     :license: This software is licensed under the MIT license
     :license: See LICENSE.txt for full license information
 """
-import datetime
 import glob
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from gamelibtools.datatable import *
 from gamelibtools.igdbclient import IgdbClient
 from gamelibtools.logger import Logger
-from gamelibtools.util import download_file
+from gamelibtools.util import download_file, download_files, format_timestamp, list_files, load_json, save_json, where_id_in
 
 
 class DataSet:
@@ -30,6 +32,13 @@ class DataSet:
         self.tables_dir = self.data_dir + '/tables'
         self.img_dir = self.data_dir + '/images'
         self.datatables = {}
+        self.img_files = None
+        self.pending_downloads = None
+        self.pending_users = 0
+        self.dllock = threading.Lock()
+        self.reflock = threading.RLock()
+        self.download_workers = 8
+        self.fetch_workers = 4
         self.countries = {}
         self.sources = {}
         self.isloaded = False
@@ -41,8 +50,30 @@ class DataSet:
     def load(self):
         """ Load all data tables in the dataset """
         Logger.sysmsg(f"Loading IGDB data tables...")
-        for dtkey in self.datatables:
-            self.load_table(self.datatables[dtkey])
+
+        # Load tables in dependency order, each table is started as soon as all referenced tables are loaded
+        # Progress is reported per loaded table by this thread only (workers don't report fetch progress)
+        deps = {dtkey: self._get_deps(dt) for dtkey, dt in self.datatables.items()}
+        total = len(deps)
+        loaded = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            while len(loaded) < total:
+                for dtkey in deps:
+                    if dtkey not in loaded and dtkey not in running.values() and deps[dtkey] <= loaded:
+                        running[executor.submit(self.load_table, self.datatables[dtkey], None, False)] = dtkey
+                if len(running) == 0:
+                    # Circular references, load next table in the configured order
+                    dtkey = next(x for x in deps if x not in loaded)
+                    self.load_table(self.datatables[dtkey], None, False)
+                    loaded.add(dtkey)
+                    Logger.report_progress("Loading data tables", len(loaded), total)
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    loaded.add(running.pop(fut))
+                    fut.result()
+                    Logger.report_progress("Loading data tables", len(loaded), total)
         self.isloaded = True
 
     def sync(self):
@@ -50,8 +81,9 @@ class DataSet:
         if not self.isloaded:
             self.load()
 
-        # Sync tables
+        # Sync tables (fresh data only)
         Logger.sysmsg(f"Syncing IGDB data tables...")
+        self.igdbapi.clear_cache()
         for dtkey in self.datatables:
             if self.datatables[dtkey].syncable:
                 dt = self.datatables[dtkey]
@@ -71,21 +103,20 @@ class DataSet:
         for dtkey in self.datatables:
             if self.datatables[dtkey].syncable:
                 self.sources['timestamps'][dtkey] = self.datatables[dtkey].lastupdate
-        with open(self._get_sources_path(), 'w', encoding='utf-8') as f:
-            json.dump(self.sources, f, indent=4)
+        save_json(self._get_sources_path(), self.sources)
         Logger.log(f"IGDB sources configuration updated with new sync timestamps")
 
-    def load_table(self, dt: DataTable, fproc = None):
-        """ Load or fetch cache table """
+    def load_table(self, dt: DataTable, fproc = None, progress: bool = True):
+        """ Load or fetch cache table (progress - report fetch progress, disabled for concurrently loaded tables) """
         if dt.has_file():
             # Lood local data
             dt.load()
             if len(dt.missingcols) > 0:
-                self.expand_table(dt, fproc)
+                self.expand_table(dt, fproc, progress=progress)
                 dt.save()
         else:
             fx = fproc if fproc is not None else self._proc_row
-            self.import_table(dt, fx)
+            self.import_table(dt, fx, progress)
 
     def sync_table(self, dt: DataTable, fproc = None):
         """ Sync table data """
@@ -97,9 +128,13 @@ class DataSet:
 
         lschema = dt.get_full_schema()
         fx = lambda row: dt.add_row(fproc(row, None, lschema, dt.tablekey))
-        self._fetch_table(dt, dt.get_fields(), total, fx, f'where {dt.tscol} > {dt.lastupdate}')
+        self._queue_downloads()
+        try:
+            self._fetch_table(dt, dt.get_fields(), total, fx, f'where {dt.tscol} > {dt.lastupdate}')
+        finally:
+            self._flush_downloads()
 
-    def import_table(self, dt: DataTable, fproc):
+    def import_table(self, dt: DataTable, fproc, progress: bool = True):
         """ Import data table """
         Logger.log(f"Fetching table '{dt.name}' from IGDB...")
 
@@ -168,34 +203,43 @@ class DataSet:
         # Download data
         lschema = dt.get_full_schema()
         count = 0
-        while count < remaining:
-            resp = self.igdbapi.req(dt.backend, f'fields {dt.get_fields()}; offset {count}; limit 500; sort {dt.sortcol} asc; {query};')
-            for x in resp:
-                y = fproc(x, None, lschema, dt.tablekey)
-                if x['id'] > maxid:
-                    maxid = x['id']
-                dt.add_row(y)
-            count += len(resp) if resp else 0
-            if store_chunks and count > 0 and count % self.chunksize == 0:
-                newfile = dt.filepath.replace('.csv', '') + f"_{maxid}_{table_ts}.tmp"
-                dt.save(newfile)
-                if len(tmpfile) > 0:
-                    os.remove(tmpfile)
-                tmpfile = newfile
-            if remaining > 1000:
-                Logger.report_progress("Loading entries", count, remaining)
-            if len(resp) == 0:
-                break
-
-        # Resolve autoreferences
-        self._resolve_autorefs(dt)
+        snapcount = dt.count()
+        self._queue_downloads()
+        try:
+            for resp in self._fetch_pages(dt, dt.get_fields(), remaining, query):
+                if len(resp) == 0:
+                    break
+                for x in resp:
+                    y = fproc(x, None, lschema, dt.tablekey)
+                    if x['id'] > maxid:
+                        maxid = x['id']
+                    dt.add_row(y)
+                count += len(resp)
+                if store_chunks and count > 0 and count % self.chunksize == 0:
+                    # Only rows fetched since the last snapshot are written
+                    newfile = dt.filepath.replace('.csv', '') + f"_{maxid}_{table_ts}.tmp"
+                    if len(tmpfile) > 0:
+                        dt.append(tmpfile, snapcount)
+                        os.replace(tmpfile, newfile)
+                    else:
+                        dt.save(newfile)
+                    snapcount = dt.count()
+                    tmpfile = newfile
+                if progress and remaining > 1000:
+                    Logger.report_progress("Loading entries", count, remaining)
+
+            # Resolve autoreferences
+            self._resolve_autorefs(dt)
+        finally:
+            # Download images
+            self._flush_downloads()
 
         # Save data table1
         dt.save()
         if len(tmpfile) > 0:
             os.remove(tmpfile)
 
-    def expand_table(self, dt: DataTable, fproc, query: str = ''):
+    def expand_table(self, dt: DataTable, fproc, query: str = '', progress: bool = True):
         """ Expand data table """
         mfields = dt.get_missing_fields()
         Logger.log(f"Expanding table {dt.name} with columns {mfields}...")
@@ -214,54 +258,68 @@ class DataSet:
                 return
 
             fx = lambda xrow: fproc(xrow, dt.get_row(xrow['id']), lschema, dt.tablekey) if dt.get_row(xrow['id']) else None
-            self._fetch_table(dt, mfields, total, fx, query)
+            self._queue_downloads()
+            try:
+                self._fetch_table(dt, mfields, total, fx, query, progress)
+            finally:
+                self._flush_downloads()
 
     def get_table(self, dname: str) -> DataTable | None:
         """ Get data table """
-        return self.datatables[dname] if dname in self.datatables else None
+        return self.datatables.get(dname)
+
+    def prefetch_refs(self, tbl: str, ids: list):
+        """ Fetch missing data table rows for multiple references at once """
+        if tbl in self.datatables and len(ids) > 0:
+            self._fetch_refs(self.datatables[tbl], ids)
 
-    def resolve_ref(self, idx: int|list, tbl: str, prop: str|list|None):
-        """ Resolve data table reference """
+    def resolve_ref(self, idx: int|list, tbl: str, prop: str|list|None, transform = None):
+        """
+        Resolve data table reference
+        :param idx: Referenced row ID(s)
+        :param tbl: Referenced table key
+        :param prop: Referenced property (or list of properties)
+        :param transform: Optional function applied to each resolved table value
+        """
         if len(tbl) == 0 or (tbl not in self.datatables and tbl != 'countries') or idx is None:
             return None
         if tbl == 'countries':
+            # Country codes may be stored as strings (CSV data / older cached data), countries are keyed by integer code
             if type(idx) is list:
-                ret = []
-                for x in idx:
-                    if str(x) not in self.countries:
-                        Logger.warning(f"Invalid country reference: {x}")
-                        continue
-                    ret.append(self.countries[str(x)])
+                countries = self.countries
+                keys = [int(x) if type(x) is str and x.isdigit() else x for x in idx]
+                ret = [countries[x] for x in keys if x in countries]
+                if len(ret) < len(idx):
+                    Logger.warning(f"Invalid country references: {[x for x in keys if x not in countries]}")
                 return ret
             else:
-                if str(idx) not in self.countries:
+                country = self.countries.get(int(idx) if type(idx) is str and idx.isdigit() else idx)
+                if country is None:
                     Logger.warning(f"Invalid country reference: {idx}")
-                    return None
-                return self.countries[str(idx)]
+                return country
         else:
             if type(idx) is list:
-                ret = []
-                for x in idx:
-                    ret.append(self._fetch_ref(self.datatables[tbl], x, prop))
-                return ret
+                dt = self.datatables[tbl]
+                self._fetch_refs(dt, idx)
+                fetch_ref = self._fetch_ref
+                if transform:
+                    return [transform(fetch_ref(dt, x, prop)) for x in idx]
+                return [fetch_ref(dt, x, prop) for x in idx]
             else:
-                return self._fetch_ref(self.datatables[tbl], idx, prop)
+                ret = self._fetch_ref(self.datatables[tbl], idx, prop)
+                return transform(ret) if transform else ret
 
     def _init(self):
         """ Initialize data tables """
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
-        if not os.path.exists(self.tables_dir):
-            os.makedirs(self.tables_dir)
-        if not os.path.exists(self.img_dir):
-            os.makedirs(self.img_dir)
-
-        self.countries = json.load(open(self.cfg_dir + '/countries.json'))
+        for dpath in (self.data_dir, self.tables_dir, self.img_dir):
+            os.makedirs(dpath, exist_ok=True)
+
+        self.countries = {int(k): v for k, v in load_json(self.cfg_dir + '/countries.json').items()}
         Logger.log(f"Countries table loaded - {len(self.countries)} entries")
 
         if not os.path.exists(self._get_sources_path()):
             return
-        self.sources = json.load(open(self._get_sources_path()))
+        self.sources = load_json(self._get_sources_path())
         for name, cfg in self.sources['tables'].items():
             vname = cfg['name'] if 'name' in cfg else name
             fname = os.path.normpath(self.tables_dir + '/' + (cfg['file'] if 'file' in cfg else f"igdb_{name}.csv"))
@@ -276,6 +334,10 @@ class DataSet:
                 self.datatables[name].lastupdate = self.sources['timestamps'][name]
         Logger.log(f"IGDB sources configuration loaded - {len(self.datatables)} data tables initialized")
 
+    def _get_deps(self, dt: DataTable) -> set:
+        """ List data tables referenced by the data table """
+        return {cx['ref'] for cx in dt.schema if type(cx) is dict and 'ref' in cx and cx['ref'] != dt.tablekey and cx['ref'] in self.datatables}
+
     def _get_sources_path(self) -> str:
         """ Get data sources file path """
         return self.cfg_dir + '/igdbsources.json'
@@ -285,36 +347,38 @@ class DataSet:
         ret = {}
         for cx in schema:
             try:
-                iscalc = 'calc' in cx and len(cx['calc']) > 0
-                srckey = cx['field'] if 'field' in cx else cx['name']
+                calc = cx.get('calc')
+                ctype = cx.get('type')
+                ref = cx.get('ref')
+                iscalc = bool(calc)
+                srckey = cx.get('field', cx['name'])
                 if srckey not in srcrow and not iscalc:
                     continue
                 vx = srcrow[srckey] if not iscalc else None
-                if 'type' in cx and (cx['type'] == 'date' or cx['type'] == 'datetime'):
+                if ctype == 'date' or ctype == 'datetime':
                     if vx > 0:
-                        dto = datetime.datetime.fromtimestamp(vx)
-                        vx = dto.strftime("%Y-%m-%d") if cx['type'] == 'date' else dto.strftime("%Y-%m-%d %H:%M:%S")
+                        vx = format_timestamp(vx, ctype == 'datetime')
                     else:
                         vx = None
-                elif 'type' in cx and cx['type'] == 'count':
-                    if iscalc and cx['calc'] in srcrow:
-                        vx = len(srcrow[cx['calc']])
+                elif ctype == 'count':
+                    if iscalc and calc in srcrow:
+                        vx = len(srcrow[calc])
                     else:
                         vx = len(vx) if type(vx) is list else None
-                elif 'ref' in cx and cx['ref'] != tkey:
+                elif ref is not None and ref != tkey:
                     if vx:
-                        isimg = 'type' in cx and cx['type'] == 'img'
-                        prop = cx['param'] if 'param' in cx else (cx['prop'] if 'prop' in cx else ('url' if isimg else 'name'))
-                        vx = self.resolve_ref(vx, cx['ref'], prop)
+                        isimg = ctype == 'img'
+                        prop = cx.get('param', cx.get('prop', 'url' if isimg else 'name'))
+                        vx = self.resolve_ref(vx, ref, prop)
                         if isimg:
-                            download = cx['download'] if 'download' in cx else True
-                            fpref = cx['fileprefix'] if 'fileprefix' in cx else "img"
-                            ftokenkey = cx['filetoken'] if 'filetoken' in cx else "slug"
-                            ftoken = srcrow[ftokenkey] if ftokenkey in srcrow else str(srcrow['id'])
+                            download = cx.get('download', True)
+                            fpref = cx.get('fileprefix', "img")
+                            ftokenkey = cx.get('filetoken', "slug")
+                            ftoken = srcrow.get(ftokenkey, str(srcrow['id']))
                             vx = self._resolve_img(vx, fpref, ftoken, download)
                     else:
                         vx = None
-                elif 'proc' in cx and cx['prop'] and type(vx) is str:
+                elif cx.get('proc') and type(vx) is str:
                     vx = vx.replace("_", " ").capitalize()
                 if dstrow:
                     dstrow[cx['name']] = vx
@@ -329,58 +393,96 @@ class DataSet:
         if len(arcols) == 0:
             return
 
-        # Resolve auto references
+        # Resolve auto references (column parameters are resolved once, outside of the row loop)
+        refcols = [(col['name'], col['ref'], col.get('param', col.get('prop', 'name'))) for col in arcols]
+        resolve_ref = self.resolve_ref
         for row in dt.data:
-            for col in arcols:
-                cname = col['name']
+            for cname, tbl, prop in refcols:
                 if cname not in row:
                     continue
-                prop = col['param'] if 'param' in col else (col['prop'] if 'prop' in col else 'name')
-                row[cname] = self.resolve_ref(row[cname], col['ref'], prop)
+                row[cname] = resolve_ref(row[cname], tbl, prop)
 
     def _resolve_img(self, url: str|list, pref: str, iname: str, download: bool) -> dict|list:
         """ Resolve image reference """
         if type(url) is list:
-            ret = []
-            for ux in url:
-                ret.append(self._fetch_img(ux, pref, iname, download))
-            return ret
+            fetch_img = self._fetch_img
+            return [fetch_img(ux, pref, iname, download) for ux in url]
         else:
             return self._fetch_img(url, pref, iname, download)
 
-    def _fetch_table(self, dt: DataTable, fields: str, total: int, fproc, query: str):
+    def _fetch_table(self, dt: DataTable, fields: str, total: int, fproc, query: str, progress: bool = True):
         """ Fetch table data """
         Logger.log(f"{total} entries found. Importing data...")
         count = 0
-        while count < total:
-            resp = self.igdbapi.req(dt.backend, f'fields {fields}; offset {count}; limit 500; sort {dt.sortcol} asc; {query};')
+        for resp in self._fetch_pages(dt, fields, total, query):
+            if len(resp) == 0:
+                break
             for x in resp:
                 fproc(x)
-            count += len(resp) if resp else 0
-            if total > 1000:
+            count += len(resp)
+            if progress and total > 1000:
                 Logger.report_progress("Loading entries", count, total)
 
+    def _fetch_pages(self, dt: DataTable, fields: str, total: int, query: str):
+        """ Fetch table data pages concurrently (pages are returned in order, up to fetch_workers pages are requested ahead, failed page request raises) """
+        freq = lambda offset: self.igdbapi.req(dt.backend, f'fields {fields}; offset {offset}; limit 500; sort {dt.sortcol} asc; {query};')
+        offsets = iter(range(0, total, 500))
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.fetch_workers)
+        try:
+            for offset in offsets:
+                pending.append(executor.submit(freq, offset))
+                if len(pending) >= self.fetch_workers:
+                    break
+            while len(pending) > 0:
+                resp = pending.popleft().result()
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(executor.submit(freq, offset))
+                yield resp
+        finally:
+            # Pending page requests are dropped once the caller stops reading (empty page / error)
+            executor.shutdown(cancel_futures=True)
+
     def _fetch_ref(self, dt:DataTable, idx: int, prop: str | list | None):
         """ Fetch reference value """
         if not dt.in_index(idx):
-            resp = self.igdbapi.req(dt.backend, f'fields {dt.get_fields()}; limit 500; where id = {idx};')
-            if resp is None or len(resp) == 0:
-                Logger.warning(f"Invalid '{dt.name}' table reference: {idx}")
-                return None
-            src = self._proc_row(resp[0], None, dt.get_full_schema(), dt.tablekey)
-            dt.add_row(src)
+            with self.reflock:
+                src = dt.get_row(idx)
+                if src is None:
+                    resp = self.igdbapi.req(dt.backend, f'fields {dt.get_fields()}; limit 500; where id = {idx};')
+                    if resp is None or len(resp) == 0:
+                        Logger.warning(f"Invalid '{dt.name}' table reference: {idx}")
+                        return None
+                    src = self._proc_row(resp[0], None, dt.get_full_schema(), dt.tablekey)
+                    dt.add_row(src)
         else:
             src = dt.get_row(idx)
 
         if type(prop) is list:
-            ret = {}
-            for key in prop:
-                ret[key] = src[key]
-            return ret
+            return {key: src[key] for key in prop}
         else:
             haskey = prop is not None and len(prop) > 0
             return src[prop] if haskey and prop in src else src
 
+    def _fetch_refs(self, dt: DataTable, ids: list):
+        """ Fetch missing references in batches (one request per 500 IDs) """
+        missing = [x for x in dict.fromkeys(ids) if not dt.in_index(x)]
+        if len(missing) == 0:
+            return
+
+        # Requests are sent outside of the lock so multiple tables can be fetched concurrently, rows are added under the lock
+        fields = dt.get_fields()
+        lschema = dt.get_full_schema()
+        for i in range(0, len(missing), 500):
+            resp = self.igdbapi.req(dt.backend, f'fields {fields}; limit 500; {where_id_in(missing[i:i + 500])}')
+            if not resp:
+                continue
+            with self.reflock:
+                for row in resp:
+                    if not dt.in_index(row['id']):
+                        dt.add_row(self._proc_row(row, None, lschema, dt.tablekey))
+
     def _fetch_img(self, url: str, pref: str, iname: str, download: bool) -> dict|None:
         """ Fetch image """
         if url is None:
@@ -388,6 +490,39 @@ class DataSet:
         ret = {}
         ret['path'] = f"{self.img_dir}/{pref}_{iname}.jpg"
         ret['url'] = 'https:' + url.replace("/t_thumb/", "/t_original/")
-        if download and not os.path.exists(ret['path']):
-            download_file(ret['path'], ret['url'])
+        if download and not self._has_img(ret['path']):
+            with self.dllock:
+                queued = self.pending_downloads is not None
+                if queued:
+                    self.pending_downloads.append((ret['path'], ret['url']))
+            if not queued and download_file(ret['path'], ret['url']):
+                self.img_files.add(os.path.basename(ret['path']))
         return ret
+
+    def _queue_downloads(self):
+        """ Start queueing image downloads (queue is shared by concurrently loaded tables) """
+        with self.dllock:
+            if self.pending_downloads is None:
+                self.pending_downloads = []
+            self.pending_users += 1
+
+    def _flush_downloads(self):
+        """ Download queued images (concurrently), once the last table using the queue is done """
+        with self.dllock:
+            self.pending_users -= 1
+            if self.pending_users > 0:
+                return
+            jobs = list(dict.fromkeys(self.pending_downloads)) if self.pending_downloads else []
+            self.pending_downloads = None
+        if len(jobs) == 0:
+            return
+        Logger.log(f"Downloading {len(jobs)} images...")
+        for fpath in download_files(jobs, self.download_workers):
+            if fpath:
+                self.img_files.add(os.path.basename(fpath))
+
+    def _has_img(self, fpath: str) -> bool:
+        """ Check if image is already downloaded (image directory is listed once) """
+        if self.img_files is None:
+            self.img_files = list_files(self.img_dir)
+        return os.path.basename(fpath) in self.img_files
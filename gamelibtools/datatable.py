@@ -8,9 +8,9 @@
     :license: See LICENSE.txt for full license information
 """
 import csv
-import json
 import os
 from gamelibtools.logger import Logger
+from gamelibtools.util import json_dumps, json_loads
 
 
 class DataTable:
@@ -43,11 +43,7 @@ class DataTable:
     @staticmethod
     def extract_fields(src: dict, params: list) -> dict:
         """ Extract fields from a object (dict) """
-        z = {}
-        for y in params:
-            if y in src:
-                z[y] = src[y]
-        return z
+        return {y: src[y] for y in params if y in src}
 
     def save(self, fpath: str = None):
         """ Save data table """
@@ -56,18 +52,30 @@ class DataTable:
             writer = csv.writer(csvfile, lineterminator='\r\n', delimiter=',', quotechar='"', quoting=csv.QUOTE_NONNUMERIC)
             writer.writerow(cols)
 
+            coltypes = self._get_col_types()
             for row in self.data:
-                rdata = self._list_fields(row) if type(row) is dict else row
+                rdata = self._list_fields(row, coltypes) if type(row) is dict else row
                 writer.writerow(rdata)
         self.issaved = True
         Logger.log(f"Data table stored to {self.filepath if not fpath else fpath}")
 
+    def append(self, fpath: str, start: int):
+        """ Append rows (from the specified position onwards) to a stored data table file """
+        with open(fpath, 'a', newline='', encoding='utf8') as csvfile:
+            writer = csv.writer(csvfile, lineterminator='\r\n', delimiter=',', quotechar='"', quoting=csv.QUOTE_NONNUMERIC)
+            coltypes = self._get_col_types()
+            for row in self.data[start:]:
+                rdata = self._list_fields(row, coltypes) if type(row) is dict else row
+                writer.writerow(rdata)
+        Logger.dbgmsg(f"{max(len(self.data) - start, 0)} rows appended to {fpath}")
+
     def load(self, fpath: str = None):
         """ Load data table from a file """
         self.lastupdate = 0
         self.index = {}
         self.missingcols = []
         checkheader = False
+        coltypes = []
         rownum = 0
         with open(self.filepath if not fpath else fpath, 'r', newline='\r\n', encoding='utf8') as csvfile:
             reader = csv.reader(csvfile, delimiter=',', quotechar='"', quoting=csv.QUOTE_NONNUMERIC)
@@ -78,9 +86,10 @@ class DataTable:
                             cname = (col['title'] if 'title' in col else col['name']) if type(col) is dict else col
                             if cname not in row:
                                 self.missingcols.append(col)
+                        coltypes = self._get_col_types(True)
                         checkheader = True
                         continue
-                    y = self._parse_fields(row)
+                    y = self._parse_fields(row, coltypes)
                     self.add_row(y)
                     rownum += 1
             except Exception as e:
@@ -97,10 +106,7 @@ class DataTable:
 
     def index_rows(self):
         """ Index data table"""
-        self.index = {}
-        for i in range(len(self.data)):
-            idx = self.data[i]['id']
-            self.index[idx] = i
+        self.index = {row['id']: i for i, row in enumerate(self.data)}
 
     def add_row(self, vrow: dict):
         """ Add / update row data """
@@ -121,21 +127,22 @@ class DataTable:
         """ Remove data row """
         if not self.in_index(rid):
             return
-        row = self.data.pop(self.index[rid])
-        self.index.pop(rid)
+        pos = self.index.pop(rid)
+        row = self.data.pop(pos)
+
+        # Rows after the removed one are shifted by one position
+        for i in range(pos, len(self.data)):
+            self.index[self.data[i]['id']] = i
         if self.syncable and self.tscol in row and row[self.tscol] == self.lastupdate:
-            self.lastupdate = max(self.data, key=lambda obj: obj[self.tscol])
+            self.update_timestamp()
         self.issaved = False
 
     def get_row(self, rid: int) -> dict|None:
         """ Get data row """
-        if self.index and len(self.index) > 0:
-            if rid in self.index:
-                return self.data[self.index[rid]]
-            else:
-                return None
-        else:
-            return next((item for item in self.data if item["id"] == rid), None)
+        if len(self.index) == 0 and len(self.data) > 0:
+            self.index_rows()
+        pos = self.index.get(rid)
+        return self.data[pos] if pos is not None else None
 
     def find_row(self, prop: str, val) -> dict|None:
         """ Search for a row by cell value """
@@ -154,11 +161,7 @@ class DataTable:
 
     def get_autorefs(self) -> list:
         """ List self-referencing columns in the data table """
-        ret = []
-        for cx in self.schema:
-            if type(cx) is dict and 'ref' in cx and cx['ref'] == self.tablekey:
-                ret.append(cx)
-        return ret
+        return [cx for cx in self.schema if type(cx) is dict and cx.get('ref') == self.tablekey]
 
     def count(self) -> int:
         """ Get row count """
@@ -259,50 +262,54 @@ class DataTable:
                 raise Exception(f'Invalid data column definition: {c}')
         return cols
 
-    def _parse_fields(self, src: list) -> dict:
+    def _parse_fields(self, src: list, coltypes: list = None) -> dict:
         """ Parse data row """
         ret = {}
-        ind = 0
-        for i in range(len(self.schema)):
-            if ind >= len(src):
-                break
-            if self.schema[i] in self.missingcols:
-                continue
+        cols = coltypes if coltypes is not None else self._get_col_types(True)
+        for ind in range(min(len(cols), len(src))):
+            name, dtyp = cols[ind]
+            vx = src[ind]
             try:
-                name = self.schema[i] if type(self.schema[i]) is str else self.schema[i]['name']
-                dtyp = ('int' if name == 'id' else 'str') if type(self.schema[i]) is str else (self.schema[i]['type'] if 'type' in self.schema[i] else 'str')
                 if dtyp == 'list' or dtyp == 'dict' or dtyp == 'img':
-                    ret[name] = json.loads(src[ind]) if src[ind] != "" else None
+                    ret[name] = json_loads(vx) if vx != "" else None
                 elif dtyp == 'int' or dtyp == 'count':
-                    ret[name] = int(src[ind]) if src[ind] != "" else None
+                    ret[name] = int(vx) if vx != "" else None
                 elif dtyp == 'float':
-                    ret[name] = float(src[ind]) if src[ind] != "" else None
+                    ret[name] = float(vx) if vx != "" else None
                 elif dtyp == 'bool':
-                    ret[name] = int(src[ind]) != 0 if src[ind] != "" else False
+                    ret[name] = int(vx) != 0 if vx != "" else False
                 else:
-                    ret[name] = src[ind]
-                ind += 1
+                    ret[name] = vx
             except Exception as e:
-                raise Exception(f"Parsing data column {i}: {self.schema[i]} failed - {src[ind]}. {e}")
+                raise Exception(f"Parsing data column {ind}: {name} failed - {vx}. {e}")
         return ret
 
-    def _list_fields(self, src: dict) -> list:
-        """ List data fields in a data row """
-        z = []
+    def _get_col_types(self, skipmissing: bool = False) -> list:
+        """ Get column name / data type pairs """
+        ret = []
         for y in self.schema:
+            if skipmissing and y in self.missingcols:
+                continue
             name = y if type(y) is str else y['name']
-            dtyp = ('int' if name == 'id' else 'str') if type(y) is str else (y['type'] if 'type' in y else 'str')
-            if name in src and src[name] is not None:
-                if dtyp == 'list' or dtyp == 'dict' or dtyp == 'img':
-                    z.append(json.dumps(src[name]))
-                elif dtyp == 'int' or dtyp == 'count':
-                    z.append(int(src[name]))
-                elif dtyp == 'float':
-                    z.append(float(src[name]))
-                elif dtyp == 'bool':
-                    z.append(1 if src[name] else 0)
-                else:
-                    z.append(src[name])
-            else:
+            dtyp = ('int' if name == 'id' else 'str') if type(y) is str else y.get('type', 'str')
+            ret.append((name, dtyp))
+        return ret
+
+    def _list_fields(self, src: dict, coltypes: list = None) -> list:
+        """ List data fields in a data row """
+        z = []
+        for name, dtyp in (coltypes if coltypes is not None else self._get_col_types()):
+            vx = src.get(name)
+            if vx is None:
                 z.append(None)
-        return z
\ No newline at end of file
+            elif dtyp == 'list' or dtyp == 'dict' or dtyp == 'img':
+                z.append(json_dumps(vx).decode('utf-8'))
+            elif dtyp == 'int' or dtyp == 'count':
+                z.append(int(vx))
+            elif dtyp == 'float':
+                z.append(float(vx))
+            elif dtyp == 'bool':
+                z.append(1 if vx else 0)
+            else:
+                z.append(vx)
+        return z
@@ -7,13 +7,21 @@
     :license: This software is licensed under the MIT license
     :license: See LICENSE.txt for full license information
 """
-import json
+import os
+import threading
 import time
+from collections import OrderedDict, deque
 from gamelibtools.util import *
 
 
+class IgdbRequestError(Exception):
+    """ IGDB request failure (transport error, error response or undecodable response) """
+
+
 class IgdbClient:
     """ IGDB REST API client """
+    RETRY_STATUSES = { 429, 500, 502, 503, 504 }
+
     def __init__(self):
         self.hostname_auth = 'https://id.twitch.tv/oauth2/token'
         self.hostname_api = 'https://api.igdb.com/v4'
@@ -21,26 +29,57 @@ class IgdbClient:
         self.clientid = ''
         self.clientsecret = ''
         self.accesstoken = ''
+        self.tokenexpiry = 0
+        self.tokenfile = 'config/igdbauth.cache.json'
         self.reqlimitms = 250
-        self.lastreqtime = 0
+        self.reqburst = 4
+        self.reqtimes = deque()
+        self.reqlock = threading.Lock()
+        self.authlock = threading.Lock()
+        self.reqcache = OrderedDict()
+        self.reqcachesize = 50000
+        self.reqcachettl = 600
+        self.reqcachelock = threading.Lock()
+        self.reqpending = {}
+        self.reqtimeout = 30
+        self.reqconnections = 10
+        self.reqslots = threading.BoundedSemaphore(self.reqconnections)
+        self.reqretries = 5
+        self.reqbackoff = 0.25
+        self.session = requests.Session()
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=self.reqconnections))
         self._init()
 
     def req(self, url: str, data: str) -> dict|None:
-        """ Execute a REST API request """
-        # Check client authentication
-        if not self.is_authenticated():
-            self._auth()
-
-        # Check last request timestamp in order to adhere to the rate limits
-        self._check_limits()
-
-        # Send a request
-        Logger.dbgmsg(f"Sending a IGDB request to {url} -> {data}...")
-        response = requests.post(self.hostname_api + url, data, headers={ 'Client-ID': self.clientid, 'Authorization': 'Bearer ' + self.accesstoken })
-        self.lastreqtime = time.time_ns()
-        if response is None:
-            return None
-        return response.json()
+        """ Execute a REST API request (lookup responses are cached, count requests and paged bulk requests are not) """
+        if self.reqcachesize <= 0 or url.endswith('/count') or ' offset ' in f' {data}':
+            return self._send(url, data)
+
+        cachekey = (url, data)
+        resp = self._get_cached(cachekey)
+        if resp is not None:
+            return resp
+
+        # Identical requests sent from multiple threads are executed only once, waiting threads get the owner's result (or error)
+        with self.reqcachelock:
+            pending = self.reqpending.get(cachekey)
+            isowner = pending is None
+            if isowner:
+                pending = self.reqpending[cachekey] = { 'done': threading.Event(), 'content': None, 'error': None }
+        if not isowner:
+            pending['done'].wait()
+            if pending['error'] is not None:
+                raise pending['error']
+            return json_loads(pending['content'])
+        try:
+            return self._send(url, data, cachekey, pending=pending)
+        except BaseException as e:
+            pending['error'] = e
+            raise
+        finally:
+            with self.reqcachelock:
+                del self.reqpending[cachekey]
+            pending['done'].set()
 
     def maxval(self, url: str, col: str):
         """ Get max column value """
@@ -52,13 +91,18 @@ class IgdbClient:
         resp = self.req(url if url.endswith('/count') else url + '/count', query)
         return resp['count'] if resp and 'count' in resp else 0
 
+    def clear_cache(self):
+        """ Clear cached responses """
+        with self.reqcachelock:
+            self.reqcache.clear()
+
     def is_authenticated(self) -> bool:
-        """ Check if client is autrhenticated """
-        return len(self.accesstoken) > 0
+        """ Check if client is autrhenticated (access token is not expired) """
+        return len(self.accesstoken) > 0 and time.time() < self.tokenexpiry - 60
 
     def _init(self):
         """ Load authentication data """
-        authobj = json.load(open('config/igdbauth.json'))
+        authobj = load_json('config/igdbauth.json')
         if not authobj:
             return
         if 'clientid' in authobj:
@@ -67,19 +111,171 @@ class IgdbClient:
             self.clientsecret = authobj['clientsecret']
         Logger.dbgmsg(f"IGDB API client configuration loaded successfully, client ID: {self.clientid}")
 
+        # Reuse cached access token
+        if not os.path.exists(self.tokenfile):
+            return
+        try:
+            tokenobj = load_json(self.tokenfile)
+        except Exception as e:
+            Logger.warning(f"Loading cached IGDB access token failed. {e}")
+            return
+        if tokenobj.get('clientid') != self.clientid or 'access_token' not in tokenobj:
+            return
+        self.accesstoken = tokenobj['access_token']
+        self.tokenexpiry = tokenobj.get('expires_at', 0)
+        if self.is_authenticated():
+            Logger.dbgmsg(f"Cached IGDB access token loaded")
+
+    def _get_token(self) -> str:
+        """ Get valid access token, authenticates if needed (only threads waiting for the token are blocked meanwhile) """
+        with self.authlock:
+            if not self.is_authenticated():
+                self._auth()
+            if not self.is_authenticated():
+                raise IgdbRequestError("IGDB API client is not authenticated")
+            return self.accesstoken
+
     def _auth(self):
         """ Authenticate with the remote server """
-        response = requests.post(self.hostname_auth, { 'client_id': self.clientid, 'client_secret': self.clientsecret, 'grant_type': 'client_credentials' })
-        if response is None:
+        try:
+            response = self.session.post(self.hostname_auth, { 'client_id': self.clientid, 'client_secret': self.clientsecret, 'grant_type': 'client_credentials' }, timeout=self.reqtimeout)
+        except Exception as e:
+            Logger.error(f"IGDB API client authentication failed. {e}")
+            return
+        if response.status_code != 200:
+            Logger.error(f"IGDB API client authentication failed with status {response.status_code}. {response.text}")
+            return
+        try:
+            respobj = json_loads(response.content)
+        except Exception as e:
+            Logger.error(f"Decoding IGDB authentication response failed. {e}")
             return
-        respobj = response.json()
         if respobj is None or 'access_token' not in respobj:
             return
         Logger.log("IGDB API client authenticated successfully")
         self.accesstoken = respobj['access_token']
+        self.tokenexpiry = time.time() + respobj.get('expires_in', 3600)
+
+        # Store access token for the following runs
+        try:
+            save_json(self.tokenfile, { 'clientid': self.clientid, 'access_token': self.accesstoken, 'expires_at': self.tokenexpiry })
+        except Exception as e:
+            Logger.warning(f"Storing IGDB access token failed. {e}")
+
+    def _reset_token(self, token: str):
+        """ Discard rejected access token (in memory and the cached copy), unless it was already replaced by another thread """
+        with self.authlock:
+            if self.accesstoken != token:
+                return
+            self.accesstoken = ''
+            self.tokenexpiry = 0
+            try:
+                if os.path.exists(self.tokenfile):
+                    os.remove(self.tokenfile)
+            except Exception as e:
+                Logger.warning(f"Removing cached IGDB access token failed. {e}")
+
+    def _send(self, url: str, data: str, cachekey: tuple|None = None, reauth: bool = True, pending: dict|None = None) -> dict|list:
+        """
+        Send a REST API request (transient failures are retried, rejected token is renewed once), failures raise IgdbRequestError
+        :param url: REST API endpoint
+        :param data: Query
+        :param cachekey: Cache key (response is stored in the cache if specified)
+        :param reauth: Authenticate again and retry if the access token is rejected
+        :param pending: Pending request entry (raw response is shared with the threads waiting for the same request)
+        :return: Decoded response
+        """
+        # Transient errors / rate limit responses are retried with exponential backoff (IGDB queries are idempotent POST requests)
+        # Every attempt reserves its own rate limit slot, so retries are counted by the limiter as well
+        error = ''
+        response = None
+        for attempt in range(self.reqretries + 1):
+            if attempt > 0:
+                time.sleep(self._get_backoff(response, attempt))
+
+            # Check client authentication (authentication request is not sent under the rate limit lock)
+            token = self._get_token()
+            with self.reqlock:
+                # Reserve request slot in order to adhere to the rate limits (shared by all threads)
+                delay = self._check_limits()
+
+            # Wait for the reserved slot outside of the lock, so other threads can reserve following slots meanwhile
+            if delay > 0:
+                time.sleep(delay)
+
+            # Send a request
+            Logger.dbgmsg(f"Sending a IGDB request to {url} -> {data}...")
+            try:
+                # Requests in flight are capped at the connection pool size, so pooled connections are not discarded
+                with self.reqslots:
+                    response = self.session.post(self.hostname_api + url, data, headers={ 'Client-ID': self.clientid, 'Authorization': 'Bearer ' + token }, timeout=self.reqtimeout)
+            except Exception as e:
+                response = None
+                error = f"IGDB request to {url} failed. {e}"
+                Logger.warning(error)
+                continue
+
+            # Access token revoked / rotated - authenticate again and retry the request once
+            if response.status_code == 401 and reauth:
+                Logger.warning(f"IGDB access token rejected, authenticating again...")
+                self._reset_token(token)
+                return self._send(url, data, cachekey, False, pending)
+
+            # Error responses are not returned as data, so callers can't mistake them for an empty result
+            if response.status_code != 200:
+                error = f"IGDB request to {url} failed with status {response.status_code}. {response.text}"
+                if response.status_code not in IgdbClient.RETRY_STATUSES:
+                    break
+                Logger.warning(error)
+                continue
+            try:
+                resp = json_loads(response.content)
+            except Exception as e:
+                raise IgdbRequestError(f"Decoding IGDB response from {url} failed. {e}")
+            if cachekey:
+                self._set_cached(cachekey, response.content)
+            if pending is not None:
+                pending['content'] = response.content
+            return resp
+        raise IgdbRequestError(error)
+
+    def _get_backoff(self, response, attempt: int) -> float:
+        """ Get wait time before the next attempt (Retry-After header of the rate limit response is respected) """
+        retryafter = response.headers.get('Retry-After') if response is not None else None
+        try:
+            if retryafter:
+                return float(retryafter)
+        except ValueError:
+            pass
+        return self.reqbackoff * (2 ** (attempt - 1))
+
+    def _get_cached(self, key: tuple):
+        """ Get cached response (LRU, entries expire after reqcachettl seconds), each call decodes a new copy of the response """
+        with self.reqcachelock:
+            entry = self.reqcache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.reqcachettl:
+                del self.reqcache[key]
+                return None
+            self.reqcache.move_to_end(key)
+            content = entry[1]
+        return json_loads(content)
+
+    def _set_cached(self, key: tuple, resp: bytes):
+        """ Store response in the cache (raw response body) """
+        with self.reqcachelock:
+            self.reqcache[key] = (time.monotonic(), resp)
+            self.reqcache.move_to_end(key)
+            while len(self.reqcache) > self.reqcachesize:
+                self.reqcache.popitem(last=False)
 
-    def _check_limits(self):
-        """ Check request limits """
-        if self.lastreqtime > 0 and time.time_ns() - self.lastreqtime < self.reqlimitms * 1000000:
-            dursec = (self.reqlimitms * 1000000 - (time.time_ns() - self.lastreqtime)) / 1000000000.0
-            time.sleep(dursec)
+    def _check_limits(self) -> float:
+        """ Reserve request slot (sliding window - at most reqburst requests per reqburst * reqlimitms), returns wait time in seconds """
+        now = time.monotonic()
+        window = self.reqburst * self.reqlimitms / 1000.0
+        slot = max(now, self.reqtimes[0] + window) if len(self.reqtimes) >= self.reqburst else now
+        self.reqtimes.append(slot)
+        if len(self.reqtimes) > self.reqburst:
+            self.reqtimes.popleft()
+        return slot - now
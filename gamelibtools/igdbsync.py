@@ -7,11 +7,10 @@
     :license: This software is licensed under the MIT license
     :license: See LICENSE.txt for full license information
 """
-import copy
-import datetime
-import json
+import heapq
 import os
-from types import NoneType
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from gamelibtools.dataset import DataSet
 from gamelibtools.datatable import DataTable
@@ -20,6 +19,24 @@ from gamelibtools.util import *
 
 class IgdbSync:
     """ IGDB data / sync manager """
+    __slots__ = ('config_dir', 'log_dir', 'data_dir', 'tables_dir', 'screenshot_dir', 'covers_dir', 'artwork_dir', 'gamecards_dir', 'gameindex_dir', 'platform_stats_file',
+                 'apiclient', 'dataset', 'games_manifest', 'games_plaforms_index', 'games_plaforms_index_cols', 'ref_lookups', 'ref_values', 'game_refs', 'gamecard_files', 'image_files', 'schema_items', 'import_workers', 'isloaded')
+    GAME_TYPE_STATS = { 'Main Game': 'games', 'Remaster': 'remakes', 'Remake': 'remakes', 'Bundle': 'bundles', 'Expanded Game': 'bundles' }
+    ACTIVE_STATUSES = { '', 'Released' }
+    GAME_DATA_REFS = { 'player_perspectives', 'keywords', 'themes', 'collections', 'websites', 'language_supports', 'external_games' }
+    GAME_GAME_REFS = { 'parent_game', 'similar_games', 'bundles', 'dlcs', 'expanded_games', 'expansions', 'forks', 'ports', 'remakes', 'remasters', 'standalone_expansions', 'version_parent' }
+    GAME_PLAYTIME_REFS = { 'time_normal', 'time_minimal', 'time_full', 'time_count' }
+    GAME_MANIFEST_REFS = { 'game_status', 'game_type', 'genres', 'alternative_names', 'platforms', 'game_engines', 'game_modes' }
+    GAME_COLUMN_TYPES = {
+        **dict.fromkeys(GAME_DATA_REFS, 'dref'), **dict.fromkeys(GAME_GAME_REFS, 'gref'), **dict.fromkeys(GAME_PLAYTIME_REFS, 'pref'),
+        'first_release_date': 'date', 'franchises': 'franchises', 'game_localizations': 'localizations', 'age_ratings': 'ratings',
+        'videos': 'videos', 'multiplayer_modes': 'multiplayer', 'cover': 'cover', 'screenshots': 'screenshots', 'artworks': 'artworks'
+    }
+    GAME_SUB_REFS = {
+        'age_ratings': { 'organization': 'age_rating_organizations', 'rating': 'age_rating_categories', 'descriptions': 'age_rating_content_descriptions' },
+        'game_localizations': { 'region': 'regions' },
+        'multiplayer_modes': { 'platform': 'platforms' }
+    }
 
     def __init__(self, datapath: str):
         """ Class constructor """
@@ -37,25 +54,18 @@ class IgdbSync:
         self.dataset = DataSet(self.apiclient, self.data_dir, self.config_dir)
         self.games_manifest = DataTable("games_manifest", "Games manifest", f"{self.tables_dir}/igdb_games_manifest.csv", '/games', self.dataset.sources['games_manifest']['schema'])
         self.games_plaforms_index = {}
-        self.games_plaforms_index_cols = ['id', 'name', 'game_type', 'release_dates', 'genres', 'metascore', 'rating']
+        self.games_plaforms_index_cols = ('id', 'name', 'game_type', 'release_dates', 'genres', 'metascore', 'rating')
+        self.ref_lookups = {}
+        self.ref_values = {}
+        self.game_refs = {}
+        self.gamecard_files = None
+        self.image_files = {}
+        self.schema_items = {}
+        self.import_workers = 4
         self.isloaded = False
 
-        if not os.path.exists(self.log_dir):
-            os.makedirs(self.log_dir)
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
-        if not os.path.exists(self.tables_dir):
-            os.makedirs(self.tables_dir)
-        if not os.path.exists(self.screenshot_dir):
-            os.makedirs(self.screenshot_dir)
-        if not os.path.exists(self.covers_dir):
-            os.makedirs(self.covers_dir)
-        if not os.path.exists(self.artwork_dir):
-            os.makedirs(self.artwork_dir)
-        if not os.path.exists(self.gamecards_dir):
-            os.makedirs(self.gamecards_dir)
-        if not os.path.exists(self.gameindex_dir):
-            os.makedirs(self.gameindex_dir)
+        for dpath in (self.log_dir, self.data_dir, self.tables_dir, self.screenshot_dir, self.covers_dir, self.artwork_dir, self.gamecards_dir, self.gameindex_dir):
+            os.makedirs(dpath, exist_ok=True)
 
     def load(self):
         """ Load all data tables """
@@ -69,10 +79,11 @@ class IgdbSync:
         # Load platform indices
         Logger.sysmsg(f"Loading platform indices...")
         customplatf = 'platforms' in self.dataset.sources['platform_index']
-        plist = self.dataset.sources['platform_index']['platforms'] if customplatf else self.dataset.get_table('platforms').index
+        platforms = self.dataset.get_table('platforms')
+        plist = self.dataset.sources['platform_index']['platforms'] if customplatf else platforms.index
         skipunsorted = not self.dataset.sources['platform_index']['unsorted'] if 'unsorted' in self.dataset.sources['platform_index'] else customplatf
         for pid in plist:
-            pinf = self.dataset.get_table('platforms').get_row(pid)
+            pinf = platforms.get_row(pid)
             if not pinf:
                 continue
             ndt = DataTable(f"gameindex_{pinf['slug']}", f"Platform -{pinf['name']}- game index", f"{self.gameindex_dir}/gameindex_{pinf['slug']}.csv", '', self.dataset.sources['platform_index']['schema'])
@@ -81,13 +92,12 @@ class IgdbSync:
             ndt = DataTable(f"gameindex_unsorted", f"Unsorted games index", f"{self.gameindex_dir}/gameindex_unsorted.csv", '', self.dataset.sources['platform_index']['schema'])
             self.games_plaforms_index[0] = ndt
 
-        isfullind = True
-        for pid in self.games_plaforms_index:
-            if self.games_plaforms_index[pid].has_file():
-                self.games_plaforms_index[pid].load()
-            else:
-                isfullind = False
-        if not isfullind:
+        # Load stored indices (single directory scan), indices are rebuilt if any of the index files is missing
+        indexfiles = list_files(self.gameindex_dir)
+        if all(os.path.basename(dt.filepath) in indexfiles for dt in self.games_plaforms_index.values()):
+            for dt in self.games_plaforms_index.values():
+                dt.load()
+        else:
             self._index_platform_games(skipunsorted)
 
         self.isloaded = True
@@ -97,9 +107,12 @@ class IgdbSync:
         if not self.isloaded:
             self.load()
         self.dataset.sync()
+        self.ref_lookups = {}
+        self.ref_values = {}
 
         # Sync game manifest -> Update platform indices
         self.dataset.sync_table(self.games_manifest, self._proc_game_diff)
+        self.game_refs = {}
 
         # Save changes
         if not self.games_manifest.issaved:
@@ -109,53 +122,59 @@ class IgdbSync:
                 self.games_plaforms_index[pid].save()
         self.dataset.save()
 
-    def import_game(self, gid: int, loadscreenshots: bool = True, loadartwork: bool = True, overwrite: bool = False):
-        """ Import and store game card """
+    def import_game(self, gid: int, loadscreenshots: bool = True, loadartwork: bool = True, overwrite: bool = False, srvrow: dict|None = None):
+        """ Import and store game card (srvrow - prefetched IGDB game data) """
         Logger.sysmsg(f"Importing game card for game ID: {gid}")
         if not self.isloaded:
             Logger.warning(f"Unable to import game data. Games manifest not loaed")
             return
-        if gid not in self.games_manifest.index:
+        pos = self.games_manifest.index.get(gid)
+        if pos is None:
             Logger.warning(f"Skipping - Invalid game ID: {gid}")
             return
 
         # Check if game card is already downloaded
-        gameinf = copy.deepcopy(self.games_manifest.get_row(gid))
+        gameinf = dict(self.games_manifest.data[pos])
         Logger.set_context(f"{gid}: {gameinf['name']}")
-        fpath = self.gamecards_dir + f'/{gid:06}_{gameinf['slug']}.json'
-        if not overwrite and os.path.exists(fpath):
+        fpath = self._get_gamecard_path(gid, gameinf['slug'])
+        if not overwrite and self._has_gamecard(gid, gameinf['slug']):
             Logger.log(f"Game card already downloaded")
             Logger.clear_context()
             return
 
         # Get data from IGDB
-        Logger.dbgmsg(f"Fetching game info...")
-        resp = self.apiclient.req(self.games_manifest.backend, f'fields *; exclude {self.games_manifest.get_fields()}; where id = {gid};')
-        if not resp or len(resp) == 0:
-            Logger.warning(f"No game available on IGDB")
-            Logger.clear_context()
-            return
+        if srvrow is None:
+            Logger.dbgmsg(f"Fetching game info...")
+            resp = self.apiclient.req(self.games_manifest.backend, f'fields *; exclude {self.games_manifest.get_fields()}; where id = {gid};')
+            if not resp or len(resp) == 0:
+                Logger.warning(f"No game available on IGDB")
+                Logger.clear_context()
+                return
+            srvrow = resp[0]
+            self._prefetch_game_refs([srvrow], self.dataset.sources['games']['schema'])
 
         # Resolve references / Composite data
         Logger.dbgmsg(f"Resolving references...")
-        self._proc_game_row(resp[0], gameinf, self.dataset.sources['games']['schema'], loadscreenshots, loadartwork)
+        self._proc_game_row(srvrow, gameinf, self.dataset.sources['games']['schema'], loadscreenshots, loadartwork)
 
         # Save game card
         Logger.dbgmsg(f"Saving game card...")
-        with open(fpath, 'w', encoding='utf-8') as f:
-            json.dump(gameinf, f,  indent=4)
+        save_json(fpath, gameinf)
+        if self.gamecard_files is not None:
+            self.gamecard_files.add(os.path.basename(fpath))
         Logger.clear_context()
         Logger.log(f"Game card for '{gameinf['name']}' saved to '{fpath}'")
 
     def import_platform_games(self, pkey: str|int, loadscreenshots: bool = True, loadartwork: bool = False, overwrite: bool = False):
         """ Load all games for a specified platform """
         pinf = None
+        platforms = self.dataset.get_table('platforms')
         if type(pkey) is int:
-            pinf = self.dataset.get_table('platforms').get_row(pkey)
+            pinf = platforms.get_row(pkey)
         else:
             alts = ['slug', 'abbreviation', 'name']
             for prop in alts:
-                pinf = self.dataset.get_table('platforms').find_row(prop, pkey)
+                pinf = platforms.find_row(prop, pkey)
                 if pinf:
                     break
         if not pinf or 'id' not in pinf or pinf['id'] not in self.games_plaforms_index:
@@ -167,13 +186,26 @@ class IgdbSync:
             Logger.error(f"Unable to immport games for platform '{pinf['name']}'. Platform index is missing / empty")
             return
 
-        total = platform_index.count()
+        Logger.sysmsg(f"Importing {platform_index.count()} games for platform '{pinf['name']}'")
+        self.import_games(list(platform_index.index), loadscreenshots, loadartwork, overwrite)
+
+    def import_games(self, gids: list, loadscreenshots: bool = True, loadartwork: bool = False, overwrite: bool = False):
+        """ Import game cards for multiple games (game cards are imported concurrently) """
+        total = len(gids)
         count = 0
-        Logger.sysmsg(f"Importing {total} games for platform '{pinf['name']}'")
-        for gid in platform_index.index:
-            self.import_game(gid, loadscreenshots, loadartwork, overwrite)
-            count += 1
-            Logger.report_progress("Importing games", count, total)
+        schema = self.dataset.sources['games']['schema']
+        with ThreadPoolExecutor(max_workers=self.import_workers) as executor:
+            for i in range(0, total, 500):
+                # Fetch game data for the missing game cards in batches
+                chunk = gids[i:i + 500]
+                srvrows = self._fetch_games([gid for gid in chunk if overwrite or not self._has_gamecard(gid)])
+
+                # Fetch references of all games in the batch at once (one request per 500 IDs per referenced table)
+                self._prefetch_game_refs(list(srvrows.values()), schema)
+                self._prefetch_game_subrefs(list(srvrows.values()), schema)
+                for _ in executor.map(lambda gid: self.import_game(gid, loadscreenshots, loadartwork, overwrite, srvrows.get(gid)), chunk):
+                    count += 1
+                    Logger.report_progress("Importing games", count, total)
 
     def import_screenshots(self, gid: int):
         """ Load game screenshots """
@@ -185,117 +217,113 @@ class IgdbSync:
 
     def calc_stats(self):
         """ Calculate statistics """
-        def proc_game_stats(stats: dict, sid: int|str, iname: str, gameinf: dict, skiptypecount: bool = False):
-            if sid in stats:
-                stats[sid]['total'] += 1
-            else:
-                stats[sid] = { 'name': iname, 'total': 1, 'active': 0, 'games': 0, 'exp': 0, 'remakes': 0, 'bundles': 0 }
-            if 'game_status' not in gameinf or gameinf['game_status'] == '' or gameinf['game_status'] == 'Released':
-                stats[sid]['active'] += 1
-            if 'game_type' in gameinf and not skiptypecount:
-                if gameinf['game_type'] == 'Main Game':
-                    stats[sid]['games'] += 1
-                elif gameinf['game_type'] == 'Remaster' or gameinf['game_type'] == 'Remake':
-                    stats[sid]['remakes'] += 1
-                elif gameinf['game_type'] == 'Bundle' or gameinf['game_type'] == 'Expanded Game':
-                    stats[sid]['bundles'] += 1
-                else:
-                    stats[sid]['exp'] += 1
+        def proc_game_stats(stats: dict, sid: int|str, iname: str, isactive: bool, typestat: str|None):
+            sinf = stats.get(sid)
+            if sinf is None:
+                sinf = stats[sid] = { 'name': iname, 'total': 0, 'active': 0, 'games': 0, 'exp': 0, 'remakes': 0, 'bundles': 0 }
+            sinf['total'] += 1
+            if isactive:
+                sinf['active'] += 1
+            if typestat:
+                sinf[typestat] += 1
 
         # Calculate statistics
         platforms_stats = { }
         genre_stats = { }
         game_type_stats = { }
-        game_modes_stats = { }
+        game_modes_stats = Counter()
         engine_stats = { }
-        year_stats = { }
+        year_stats = Counter()
         Logger.sysmsg(f"Calculating stats...")
-        count = 0
-        for game in self.games_manifest.data:
+        companies = self.dataset.get_table('companies').data
+        game_modes = self.dataset.get_table('game_modes').data
+        franchises = self.dataset.get_table('franchises').data
+        collections = self.dataset.get_table('collections').data
+        time_to_beats = self.dataset.get_table('game_time_to_beats').data
+        total = self.games_manifest.count()
+        activestatuses = IgdbSync.ACTIVE_STATUSES
+        typestats = IgdbSync.GAME_TYPE_STATS
+        for count, game in enumerate(self.games_manifest.data, 1):
+            gyear = game.get('year') or 0
+            isactive = game.get('game_status', '') in activestatuses
+            gtype = game.get('game_type')
+            typestat = typestats.get(gtype, 'exp') if 'game_type' in game else None
+
             # Platform stats
-            if not game['platforms'] or len(game['platforms']) == 0:
-                proc_game_stats(platforms_stats, 0, '** Games with no platform data **', game)
+            platforms = game.get('platforms')
+            if not platforms:
+                proc_game_stats(platforms_stats, 0, '** Games with no platform data **', isactive, typestat)
             else:
-                for pinf in game['platforms']:
-                    proc_game_stats(platforms_stats, pinf['id'], pinf['name'], game)
+                for pinf in platforms:
+                    proc_game_stats(platforms_stats, pinf['id'], pinf['name'], isactive, typestat)
 
             # Genre stats
-            if not game['genres'] or len(game['genres']) == 0:
-                proc_game_stats(genre_stats, "0", '** Games with no genre data **', game)
+            genres = game.get('genres')
+            if not genres:
+                proc_game_stats(genre_stats, "0", '** Games with no genre data **', isactive, typestat)
             else:
-                for gx in game['genres']:
-                    proc_game_stats(genre_stats, gx, gx, game)
+                for gx in genres:
+                    proc_game_stats(genre_stats, gx, gx, isactive, typestat)
 
             # Engine stats
-            if 'game_engines' in game and game['game_engines']:
-                gyear = game['year'] if 'year' in game and game['year'] else 0
-                for gx in game['game_engines']:
-                    if gx['id'] in engine_stats:
-                        engine_stats[gx['id']]['count'] += 1
-                        if gyear == 0 or gyear < engine_stats[gx['id']]['from']:
-                            engine_stats[gx['id']]['from'] = gyear
-                        if gyear == 0 or gyear > engine_stats[gx['id']]['to']:
-                            engine_stats[gx['id']]['to'] = gyear
-                    else:
+            engines = game.get('game_engines')
+            if engines:
+                for gx in engines:
+                    einf = engine_stats.get(gx['id'])
+                    if einf is None:
                         engine_stats[gx['id']] = { 'name': gx['name'], 'count': 1, 'from': gyear, 'to': gyear }
+                        continue
+                    einf['count'] += 1
+                    if gyear == 0 or gyear < einf['from']:
+                        einf['from'] = gyear
+                    if gyear == 0 or gyear > einf['to']:
+                        einf['to'] = gyear
 
             # Game modes stats
-            if 'game_modes' in game and game['game_modes']:
-                for gx in game['game_modes']:
-                    if gx in game_modes_stats:
-                        game_modes_stats[gx] += 1
-                    else:
-                        game_modes_stats[gx] = 1
+            gmodes = game.get('game_modes')
+            if gmodes:
+                game_modes_stats.update(gmodes)
 
             # Year stats
-            if 'year' in game and game['year']:
-                if game['year'] in year_stats:
-                    year_stats[game['year']]['count'] += 1
-                else:
-                    year_stats[game['year']] = { 'name': str(game['year']), 'count': 1 }
-            else:
-                if 0 in year_stats:
-                    year_stats[0]['count'] += 1
-                else:
-                    year_stats[0] = { 'name': '-', 'count': 1 }
+            year_stats[gyear] += 1
 
             # Game release type stats
-            if not game['game_type'] or len(game['game_type']) == 0:
-                proc_game_stats(game_type_stats, "0", '** Games with no type data **', game, True)
+            if not gtype:
+                proc_game_stats(game_type_stats, "0", '** Games with no type data **', isactive, None)
             else:
-                proc_game_stats(game_type_stats, game['game_type'], game['game_type'], game, True)
+                proc_game_stats(game_type_stats, gtype, gtype, isactive, None)
 
-            count += 1
-            if count == 1 or count >= self.games_manifest.count() or count % 1000 == 0:
-                Logger.report_progress(f"Processing games", count, self.games_manifest.count())
+            if count == 1 or count >= total or count % 1000 == 0:
+                Logger.report_progress(f"Processing games", count, total)
 
         # Write platform statistics
         Logger.open_flog(f'{self.log_dir}/stats_platforms.txt')
         Logger.log("Number of games per platform\n")
         Logger.log("  id  |                         name                          |  total | active |  games | remak | bundl |  exp  ")
         Logger.log("=================================================================================================================")
-        for stat in sorted(platforms_stats.items(), key=lambda x: x[1]['total'], reverse=True):
-            Logger.log(f" {stat[0]:4}  {stat[1]['name']:55}| {stat[1]['total']:6} | {stat[1]['active']:6} | {stat[1]['games']:6} | {stat[1]['remakes']:5} | {stat[1]['bundles']:5} | {stat[1]['exp']:5}")
+        lines = [f" {sid:4}  {s['name']:55}| {s['total']:6} | {s['active']:6} | {s['games']:6} | {s['remakes']:5} | {s['bundles']:5} | {s['exp']:5}" for sid, s in sorted(platforms_stats.items(), key=lambda x: x[1]['total'], reverse=True)]
+        if lines:
+            Logger.log('\n'.join(lines))
         Logger.save_flog()
 
         # Write company statistics / Developers
-        lx = sorted(self.dataset.get_table('companies').data, key=lambda x: x['developed'] if x['developed'] else 0, reverse=True)[:100]
+        lx = heapq.nlargest(100, companies, key=lambda x: x['developed'] or 0)
         Logger.open_flog(f'{self.log_dir}/stats_developers.txt')
         Logger.log("Number of games per company\n")
         Logger.log("  no  |                         name                          |          country          |   id   |  status  | count ")
         Logger.log("======================================================================================================================")
-        for i in range(100):
+        for i in range(len(lx)):
             xstatus = lx[i]['status'] if len(lx[i]['status']) > 0 else 'Active'
             Logger.log(f" {(i + 1):4} | {lx[i]['name']:54}| {lx[i]['country']:25} | {lx[i]['id']:6} | {xstatus:8} | {lx[i]['developed']:5}")
         Logger.save_flog()
 
         # Write company statistics / Publishers
-        lx = sorted(self.dataset.get_table('companies').data, key=lambda x: x['published'] if x['published'] else 0, reverse=True)[:100]
+        lx = heapq.nlargest(100, companies, key=lambda x: x['published'] or 0)
         Logger.open_flog(f'{self.log_dir}/stats_publishers.txt')
         Logger.log("Number of games per company\n")
         Logger.log("  no  |                         name                          |          country          |   id   |  status  | count ")
         Logger.log("======================================================================================================================")
-        for i in range(100):
+        for i in range(len(lx)):
             xstatus = lx[i]['status'] if len(lx[i]['status']) > 0 else 'Active'
             Logger.log(f" {(i + 1):4} | {lx[i]['name']:54}| {lx[i]['country']:25} | {lx[i]['id']:6} | {xstatus:8} | {lx[i]['published']:5}")
         Logger.save_flog()
@@ -306,20 +334,19 @@ class IgdbSync:
         Logger.log("Games per release year\n")
         Logger.log("  no  | year |  count ")
         Logger.log("======================")
-        for year in dict(sorted(year_stats.items(), reverse=True)):
-            Logger.log(f" {i:4} | {year_stats[year]['name']:4} | {year_stats[year]['count']:6}")
+        for year, ycount in sorted(year_stats.items(), reverse=True):
+            Logger.log(f" {i:4} | {str(year) if year else '-':4} | {ycount:6}")
             i += 1
         Logger.save_flog()
 
         # Write genre stats
-        i = 1
         Logger.open_flog(f'{self.log_dir}/stats_genres.txt')
         Logger.log("Number of games per genre\n")
         Logger.log("  no  |               name                |  total | active |  games | remak | bundl |  exp  ")
         Logger.log("=============================================================================================")
-        for stat in genre_stats.items():
-            Logger.log(f" {i:4} | {stat[1]['name']:34}| {stat[1]['total']:6} | {stat[1]['active']:6} | {stat[1]['games']:6} | {stat[1]['remakes']:5} | {stat[1]['bundles']:5} | {stat[1]['exp']:5}")
-            i += 1
+        lines = [f" {i:4} | {s['name']:34}| {s['total']:6} | {s['active']:6} | {s['games']:6} | {s['remakes']:5} | {s['bundles']:5} | {s['exp']:5}" for i, s in enumerate(genre_stats.values(), 1)]
+        if lines:
+            Logger.log('\n'.join(lines))
         Logger.save_flog()
 
         # Write release type stats
@@ -339,7 +366,7 @@ class IgdbSync:
         Logger.log("Game engine stats\n")
         Logger.log("  no  |               name                | from |  to  |  count ")
         Logger.log("=================================================================")
-        for stat in dict(sorted(engine_stats.items(), key=lambda x: x[1]['count'] if x[1]['count'] else 0, reverse=True)).items():
+        for stat in sorted(engine_stats.items(), key=lambda x: x[1]['count'] if x[1]['count'] else 0, reverse=True):
             if stat[1]['count'] <= 5:
                 continue
             Logger.log(f" {i:4} | {stat[1]['name']:34}| {stat[1]['from']:4} | {stat[1]['to']:4} | {stat[1]['count']:6}")
@@ -352,51 +379,51 @@ class IgdbSync:
         Logger.log("Game modes stats\n")
         Logger.log("  no  |               name                |  count ")
         Logger.log("=================================================================")
-        for gmode in self.dataset.get_table('game_modes').data:
+        for gmode in game_modes:
             Logger.log(f" {i:4} | {gmode['name']:34}| {game_modes_stats[gmode['name']]:6}")
             i += 1
         Logger.save_flog()
 
         # Write franchise stats
-        lx = sorted(self.dataset.get_table('franchises').data, key=lambda x: x['count'] if x['count'] else 0, reverse=True)[:100]
+        lx = heapq.nlargest(100, franchises, key=lambda x: x['count'] or 0)
         Logger.open_flog(f'{self.log_dir}/stats_franchises.txt')
         Logger.log("100 biggest game franchises\n")
         Logger.log("  no  |                         name                          |   id   | count ")
         Logger.log("===============================================================================")
-        for i in range(100):
+        for i in range(len(lx)):
             Logger.log(f" {(i + 1):4} | {lx[i]['name']:54}| {lx[i]['id']:6} | {lx[i]['count']:5}")
         Logger.save_flog()
 
         # Write collection stats
-        lx = sorted(self.dataset.get_table('collections').data, key=lambda x: x['count'] if x['count'] else 0, reverse=True)[:100]
+        lx = heapq.nlargest(100, collections, key=lambda x: x['count'] or 0)
         Logger.open_flog(f'{self.log_dir}/stats_collections.txt')
         Logger.log("100 biggest game collections\n")
         Logger.log("  no  |                         name                          |   id   | count ")
         Logger.log("===============================================================================")
-        for i in range(100):
+        for i in range(len(lx)):
             Logger.log(f" {(i + 1):4} | {lx[i]['name']:54}| {lx[i]['id']:6} | {lx[i]['count']:5}")
         Logger.save_flog()
 
         # Write top 100 games by rating
-        lx = [gmx for gmx in self.games_manifest.data if gmx['rating'] and gmx['metascore'] and gmx['rating'] >= 60 and gmx['metascore'] >= 60 and gmx['game_type'] == 'Main Game']
-        lx = sorted(lx, key=lambda x: x['rating'] * 0.52 + x['metascore'] * 0.48, reverse=True)[:100]
+        # Composite rating is calculated once per candidate (score, game)
+        candidates = ((r * 0.52 + m * 0.48, gmx) for gmx in self.games_manifest.data if (r := gmx['rating']) and r >= 60 and (m := gmx['metascore']) and m >= 60 and gmx['game_type'] == 'Main Game')
+        lx = heapq.nlargest(100, candidates, key=lambda x: x[0])
         Logger.open_flog(f'{self.log_dir}/stats_top_rating.txt')
         Logger.log("Top 100 rated games\n")
         Logger.log("  no  |                            name                             | ratg | meta | totl ")
         Logger.log("=========================================================================================")
-        for i in range(100):
-            tot = int(lx[i]['rating'] * 0.52 + lx[i]['metascore'] * 0.48)
-            Logger.log(f" {(i + 1):4} | {lx[i]['name']:60}| {lx[i]['rating']:4} | {lx[i]['metascore']:4} | {tot:4}")
+        for i, (score, gmx) in enumerate(lx, 1):
+            Logger.log(f" {i:4} | {gmx['name']:60}| {gmx['rating']:4} | {gmx['metascore']:4} | {int(score):4}")
         Logger.save_flog()
 
         # Write top 100 games by playtime
-        lx = [x for x in self.dataset.get_table('game_time_to_beats').data if x['hastily'] and x['normally'] and x['normally'] >= x['hastily'] > 10000 and (not x['completely'] or x['completely'] >= x['normally'])]
-        lx = sorted(lx, key=lambda x: x['normally'], reverse=True)[:100]
+        candidates = (x for x in time_to_beats if (th := x['hastily']) and (tn := x['normally']) and tn >= th > 10000 and (not (tc := x['completely']) or tc >= tn))
+        lx = heapq.nlargest(100, candidates, key=lambda x: x['normally'])
         Logger.open_flog(f'{self.log_dir}/stats_top_playtime.txt')
         Logger.log("Top 100 games by playtime\n")
         Logger.log("  no  |                               name                                |  normal  |   fast   |   100%   ")
         Logger.log("===========================================================================================================")
-        for i in range(100):
+        for i in range(len(lx)):
             ginf = self.games_manifest.get_row(lx[i]['game_id'])
             if not ginf:
                 continue
@@ -409,26 +436,81 @@ class IgdbSync:
 
     def _index_platform_games(self, skipunsorted: bool):
         """ Index platform games """
-        # Index games
+        # Index & process games (single pass)
+        total = self.games_manifest.count()
+        count = 0
+        pindex = self.games_plaforms_index
+        procrow = self._proc_game_platform_index_row
         for gamerow in self.games_manifest.data:
-            if 'platforms' in gamerow and gamerow['platforms'] and len(gamerow['platforms']) > 0:
-                for pinf in gamerow['platforms']:
-                    self.games_plaforms_index[pinf['id']].add_row(gamerow)
+            platforms = gamerow.get('platforms')
+            if platforms:
+                for pinf in platforms:
+                    pindex[pinf['id']].add_row(procrow(gamerow, pinf))
             elif not skipunsorted:
-                self.games_plaforms_index[0].add_row(gamerow)
+                pindex[0].add_row(procrow(gamerow, None))
             else:
                 Logger.dbgmsg(f"No platform data for {gamerow['name']} (ID: {gamerow['id']})")
+            count += 1
+            if count == 1 or count == total or count % 500 == 0:
+                Logger.report_progress("Processing game entry", count, total)
 
-        # Process & Save data
+        # Save data
         for pid in self.games_plaforms_index:
-            pinf = self.dataset.get_table('platforms').get_row(pid) if pid > 0 else None
-            total = len(self.games_plaforms_index[pid].data)
-            for ind in range(total):
-                self.games_plaforms_index[pid].data[ind] = self._proc_game_platform_index_row(self.games_plaforms_index[pid].data[ind],pinf)
-                if total > 0 and (ind == 0 or ind == total - 1 or ind % 500 == 0):
-                    Logger.report_progress("Processing game entry", ind + 1, total)
             self.games_plaforms_index[pid].save()
 
+    def _get_schema_items(self, schema: list) -> list:
+        """ Get (source key, destination key, is calculated, column) entries of a schema (resolved once per schema) """
+        entry = self.schema_items.get(id(schema))
+        if entry is None or entry[0] is not schema:
+            entry = self.schema_items[id(schema)] = (schema, [(cx.get('field', cx['name']), cx['name'], bool(cx.get('calc')), cx) for cx in schema])
+        return entry[1]
+
+    def _fetch_games(self, gids: list) -> dict:
+        """ Fetch game data for multiple games (single request, up to 500 games) """
+        if len(gids) == 0:
+            return {}
+        resp = self.apiclient.req(self.games_manifest.backend, f'fields *; exclude {self.games_manifest.get_fields()}; limit 500; {where_id_in(gids)}')
+        return {x['id']: x for x in resp} if resp else {}
+
+    def _has_gamecard(self, gid: int, slug: str|None = None) -> bool:
+        """ Check if game card is already downloaded (game cards directory is scanned once) """
+        if slug is None:
+            gameinf = self.games_manifest.get_row(gid)
+            if gameinf is None:
+                return False
+            slug = gameinf['slug']
+        if self.gamecard_files is None:
+            self.gamecard_files = list_files(self.gamecards_dir)
+        return os.path.basename(self._get_gamecard_path(gid, slug)) in self.gamecard_files
+
+    def _get_gamecard_path(self, gid: int, slug: str) -> str:
+        """ Get game card file path """
+        return f"{self.gamecards_dir}/{gid:06}_{slug}.json"
+
+    def _has_cover(self, gid: int) -> bool:
+        """ Check if game cover is already downloaded """
+        gameinf = self.games_manifest.get_row(gid)
+        return gameinf is not None and self._has_image(self._get_cover_path(gid, gameinf['slug']))
+
+    def _has_image(self, fpath: str) -> bool:
+        """ Check if image is already downloaded (each image directory is scanned once) """
+        dpath, fname = os.path.split(fpath)
+        dirfiles = self.image_files.get(dpath)
+        if dirfiles is None:
+            dirfiles = self.image_files[dpath] = list_files(dpath)
+        return fname in dirfiles
+
+    def _download_images(self, jobs: list):
+        """ Download images concurrently and register downloaded files """
+        for fpath in download_files(jobs, self.dataset.download_workers):
+            if fpath:
+                dpath, fname = os.path.split(fpath)
+                self.image_files.setdefault(dpath, set()).add(fname)
+
+    def _get_cover_path(self, gid: int, slug: str) -> str:
+        """ Get game cover file path """
+        return f"{self.covers_dir}/cover_{slug}_{gid}.jpg"
+
     def _import_game_images(self, gid: int, iname: str, prop: str, dtable: str, imgdir: str, fpref: str):
         """ Import / load game related images """
         Logger.sysmsg(f"Importing game {iname} for game ID: {gid}")
@@ -439,10 +521,10 @@ class IgdbSync:
 
         Logger.set_context(f"{gid}: {gameinf['name']}")
         Logger.dbgmsg("Game manifest found. Searching for game card...")
-        fpath = self.gamecards_dir + f'/{gid:06}_{gameinf['slug']}.json'
-        if os.path.exists(fpath):
+        fpath = self._get_gamecard_path(gid, gameinf['slug'])
+        if self._has_gamecard(gid, gameinf['slug']):
             Logger.dbgmsg(f"Game card '{fpath}' found. Loading data...")
-            gamedata = json.load(open(fpath, 'r', encoding='utf-8'))
+            gamedata = load_json(fpath)
             if not gamedata:
                 Logger.error(f"Unable to load game {iname}. Game card '{fpath}' is corrupted")
                 Logger.clear_context()
@@ -452,18 +534,18 @@ class IgdbSync:
                 Logger.clear_context()
                 return
             Logger.dbgmsg(f"Game card '{fpath}' loaded. Downloading images...")
-            cnt = 0
-            for imginf in gamedata[prop]:
-                if not os.path.exists(imginf['path']):
-                    download_file(imginf['path'], imginf['url'])
-                    cnt += 1
+            missing = [imginf for imginf in gamedata[prop] if not self._has_image(imginf['path'])]
+            for imginf in missing:
+                Logger.dbgmsg(f"Image '{imginf['path']}' is missing")
+            self._download_images([(imginf['path'], imginf['url']) for imginf in missing])
+            cnt = len(missing)
             Logger.clear_context()
             Logger.log(f"{cnt} {iname} imported for game '{gameinf['name']}'")
         else:
             # Obtain image data from IGDB
             resp = self.apiclient.req(self.games_manifest.backend, f'fields {prop}; where id = {gid};')
             if resp is None or len(resp) == 0 or prop not in resp[0] or not resp[0][prop] or len(resp[0][prop]) == 0:
-                Logger.error("Unable to load game {iname}. No images defined for the specified game")
+                Logger.error(f"Unable to load game {iname}. No images defined for the specified game")
                 Logger.clear_context()
                 return
             cnt = len(resp[0][prop])
@@ -476,31 +558,22 @@ class IgdbSync:
         try:
             ret = {}
             cmpproc = False
-            for cx in schema:
-                srckey = cx['field'] if 'field' in cx else cx['name']
-                dstkey = cx['name']
-                isproc = 'calc' in cx and len(cx['calc']) > 0
+            resolve_ref = self.dataset.resolve_ref
+            resolve_value = self._resolve_value
+            mrefs = IgdbSync.GAME_MANIFEST_REFS
+            for srckey, dstkey, isproc, cx in self._get_schema_items(schema):
                 if srckey not in srcrow and not isproc:
                     continue
-                if srckey == 'game_status' or srckey == 'game_type' or srckey == 'genres' or srckey == 'alternative_names' or srckey == 'platforms' or srckey == 'game_engines' or srckey == 'game_modes':
-                    ret[dstkey] = self.dataset.resolve_ref(srcrow[srckey], cx['ref'], cx['prop'])
+                if srckey in mrefs:
+                    ret[dstkey] = resolve_ref(srcrow[srckey], cx['ref'], cx['prop'])
                 elif srckey == 'release_dates':
-                    np = []
-                    for rdinf in self.dataset.resolve_ref(srcrow[srckey], cx['ref'], cx['prop']):
-                        ydata = { 'date': rdinf['human'] }
-                        if 'release_region' in rdinf:
-                            ydata['region'] = self.dataset.resolve_ref(rdinf['release_region'], 'release_date_regions', 'region')
-                        if 'status' in rdinf:
-                            ydata['status'] = self.dataset.resolve_ref(rdinf['status'], 'release_date_statuses', 'name')
-                        if 'platform' in rdinf:
-                            ydata['platform'] = self.dataset.resolve_ref(rdinf['platform'], 'platforms', 'name')
-                        np.append(ydata)
-                    ret[dstkey] = np
+                    ret[dstkey] = resolve_ref(srcrow[srckey], cx['ref'], cx['prop'], self._proc_release_date)
                 elif srckey == 'year':
-                    lsr = ret['release_dates'] if 'release_dates' in ret else (dstrow['release_dates'] if 'release_dates' in dstrow else (srcrow['release_dates'] if 'release_dates' in srcrow else None))
+                    # Use processed/resolved data if available (new rows are processed without a destination row)
+                    isresolved = 'release_dates' in ret or (dstrow is not None and 'release_dates' in dstrow)
+                    lsr = (ret['release_dates'] if 'release_dates' in ret else dstrow['release_dates']) if isresolved else srcrow.get('release_dates')
                     if lsr:
-                        # Use processed/resolved data
-                        infkey = 'date' if 'release_dates' in ret or 'release_dates' in dstrow else 'human'
+                        infkey = 'date' if isresolved else 'human'
                         myear = 0
                         for rdinf in lsr:
                             xyear = extract_year(rdinf[infkey])
@@ -512,24 +585,25 @@ class IgdbSync:
                 elif srckey == 'involved_companies':
                     if cmpproc:
                         continue
-                    ret['developers'] = []
-                    ret['publishers'] = []
-                    for xinf in self.dataset.resolve_ref(srcrow[srckey], 'involved_companies', None):
-                        yinf = self.dataset.resolve_ref(xinf['company'], 'companies', ['id', 'name'])
-                        if 'publisher' in xinf and xinf['publisher']:
-                            ret['publishers'].append(yinf)
-                        if 'developer' in xinf and xinf['developer']:
-                            if 'porting' in xinf and xinf['porting']:
-                                yinf['porting'] = True
-                            if 'supporting' in xinf and xinf['supporting']:
-                                yinf['supporting'] = True
-                            ret['developers'].append(yinf)
-                        elif ('porting' in xinf and xinf['porting']) or ('supporting' in xinf and xinf['supporting']):
-                            if 'porting' in xinf and xinf['porting']:
+                    cmpproc = True
+                    developers = ret['developers'] = []
+                    publishers = ret['publishers'] = []
+                    for xinf in resolve_ref(srcrow[srckey], 'involved_companies', None):
+                        yinf = resolve_value(xinf['company'], 'companies', 'name')
+                        yinf = { 'id': xinf['company'], 'name': yinf } if yinf is not None else None
+                        if xinf.get('publisher'):
+                            publishers.append(yinf)
+                        porting = xinf.get('porting')
+                        supporting = xinf.get('supporting')
+                        if xinf.get('developer') or porting or supporting:
+                            if porting or supporting:
+                                # Developer entry flags are not shared with the publisher entry
+                                yinf = dict(yinf)
+                            if porting:
                                 yinf['porting'] = True
-                            if 'supporting' in xinf and xinf['supporting']:
+                            if supporting:
                                 yinf['supporting'] = True
-                            ret['developers'].append(yinf)
+                            developers.append(yinf)
                 else:
                     ret[dstkey] = srcrow[srckey]
             if dstrow:
@@ -540,45 +614,40 @@ class IgdbSync:
             Logger.error(f"Game manifest parsing failed, row ID {srcrow['id']}: {srcrow}. {e}")
             raise e
 
-    def _proc_game_diff(self, row: dict, schema: list, tkey: str) -> dict:
+    def _proc_game_diff(self, row: dict, dstrow: dict|None, schema: list, tkey: str) -> dict:
         """ Process new game data during sync """
-        ret = self._proc_game_manifest_row(row, None, schema, tkey)
-
-        # Remove game from platform indices
-        orgrow = self.games_manifest.get_row(row['id'])
-        if orgrow:
-            if 'platforms' in orgrow and orgrow['platforms'] and len(orgrow['platforms']) > 0:
-                for pinf in orgrow['platforms']:
-                    self.games_plaforms_index[pinf['id']].remove_row(row['id'])
-            elif 0 in self.games_plaforms_index:
-                self.games_plaforms_index[0].remove_row(row['id'])
-
-        # Add game to platform indices
-        if 'platforms' in ret and ret['platforms'] and len(ret['platforms']) > 0:
-            for pinf in ret['platforms']:
-                x = self._proc_game_platform_index_row(ret, pinf)
-                self.games_plaforms_index[pinf['id']].add_row(x)
-        elif 0 in self.games_plaforms_index:
-            x = self._proc_game_platform_index_row(ret, None)
-            self.games_plaforms_index[0].add_row(x)
+        ret = self._proc_game_manifest_row(row, dstrow, schema, tkey)
+        pindex = self.games_plaforms_index
+        gid = row['id']
+
+        # Platform indices containing the game before / after the update (0 - unsorted games)
+        orgrow = self.games_manifest.get_row(gid)
+        orgplatforms = orgrow.get('platforms') if orgrow else None
+        oldpids = {pinf['id'] for pinf in orgplatforms} if orgplatforms else ({0} if orgrow else set())
+        platforms = ret.get('platforms')
+        newrows = {pinf['id']: self._proc_game_platform_index_row(ret, pinf) for pinf in platforms} if platforms else {0: self._proc_game_platform_index_row(ret, None)}
+
+        # Update changed index rows only, so unchanged platform indices are not stored again
+        for pid in oldpids - newrows.keys():
+            if pid in pindex:
+                pindex[pid].remove_row(gid)
+        for pid, x in newrows.items():
+            if pid in pindex and pindex[pid].get_row(gid) != x:
+                pindex[pid].add_row(x)
         return ret
 
     def _proc_game_platform_index_row(self, row: dict, pinf: dict|None) -> dict:
         """ Process games platform index row """
-        ret = DataTable.extract_fields(row, self.games_plaforms_index_cols)
-        if 'release_dates' in row and row['release_dates']:
-            rx = []
-            relyear = 0
-            for reldinf in row['release_dates']:
-                rdyear = extract_year(reldinf['date'])
-                if relyear == 0 or rdyear < relyear:
-                    relyear = rdyear
-                validplatf = (not pinf and 'platform' not in reldinf) or (pinf and 'platform' in reldinf and reldinf['platform'] == pinf['name'])
-                if not validplatf:
-                    continue
-                if 'platform' in reldinf:
-                    reldinf.pop('platform')
-                rx.append(reldinf)
+        ret = {k: row[k] for k in self.games_plaforms_index_cols if k in row}
+        rdates = row.get('release_dates')
+        if rdates:
+            relyear = min((y for y in map(extract_year, [x['date'] for x in rdates]) if y), default=0)
+            if pinf:
+                # Release dates are shared with the manifest row, platform is dropped from a copy
+                pname = pinf['name']
+                rx = [{k: v for k, v in x.items() if k != 'platform'} for x in rdates if x.get('platform') == pname]
+            else:
+                rx = [x for x in rdates if 'platform' not in x]
             ret['release_dates'] = rx
             ret['year'] = relyear if relyear > 0 else None
         return ret
@@ -586,110 +655,236 @@ class IgdbSync:
     def _proc_game_row(self, srvrow: dict, locrow: dict, schema: list, loadscreenshots: bool = True, loadartwork: bool = True):
         """ Process game table row """
         try:
-            drefs = ['player_perspectives', 'keywords', 'themes', 'collections', 'websites', 'language_supports', 'external_games']
-            grefs = ['parent_game', 'similar_games', 'bundles', 'dlcs', 'expanded_games', 'expansions', 'forks', 'ports', 'remakes', 'remasters', 'standalone_expansions', 'version_parent']
-            prefs = ['time_normal', 'time_minimal', 'time_full', 'time_count']
-            for cx in schema:
-                srckey = cx['field'] if 'field' in cx else cx['name']
-                dstkey = cx['name']
-                isproc = 'calc' in cx and len(cx['calc']) > 0
+            covpath = self._get_cover_path(locrow['id'], locrow['slug'])
+            hascover = self._has_image(covpath)
+            dljobs = []
+            ptinfs = {}
+
+            # Column types are looked up once per column, plain columns are copied without walking the type checks
+            coltypes = IgdbSync.GAME_COLUMN_TYPES
+            resolve_ref = self.dataset.resolve_ref
+            for srckey, dstkey, isproc, cx in self._get_schema_items(schema):
                 if srckey not in srvrow and not isproc:
                     continue
 
-                if srckey in drefs:
-                    locrow[dstkey] = self.dataset.resolve_ref(srvrow[srckey], cx['ref'], cx['prop'])
-                elif srckey in grefs:
+                ctype = coltypes.get(srckey)
+                if ctype is None:
+                    locrow[dstkey] = srvrow[srckey]
+                elif ctype == 'dref':
+                    locrow[dstkey] = resolve_ref(srvrow[srckey], cx['ref'], cx['prop'])
+                elif ctype == 'gref':
                     locrow[dstkey] = self._resolve_game_ref(srvrow[srckey])
-                elif srckey in prefs:
-                    ptinf = self.dataset.get_table(cx['ref']).find_row(cx['calc'], srvrow['id'])
+                elif ctype == 'pref':
+                    # Playtime columns share the same time-to-beat row, it is looked up once per game
+                    ptkey = (cx['ref'], cx['calc'])
+                    if ptkey not in ptinfs:
+                        ptinfs[ptkey] = self._find_ref_row(cx['ref'], cx['calc'], srvrow['id'])
+                    ptinf = ptinfs[ptkey]
                     if ptinf:
                         locrow[dstkey] = seconds_to_hours(ptinf[cx['prop']]) if cx['type'] == 'float' and ptinf[cx['prop']] else ptinf[cx['prop']]
-                elif srckey == 'first_release_date':
-                    locrow[dstkey] = datetime.datetime.fromtimestamp(srvrow[srckey]).strftime("%Y-%m-%d") if srvrow[srckey] > 0 else None
-                elif srckey == 'franchises':
+                elif ctype == 'date':
+                    locrow[dstkey] = format_timestamp(srvrow[srckey]) if srvrow[srckey] > 0 else None
+                elif ctype == 'franchises':
                     rx = []
                     if 'franchise' in srvrow:
-                        rx.append(self.dataset.resolve_ref(srvrow['franchise'], cx['ref'], cx['prop']))
+                        rx.append(resolve_ref(srvrow['franchise'], cx['ref'], cx['prop']))
                     if 'franchises' in srvrow:
-                        rx = rx + self.dataset.resolve_ref(srvrow['franchises'], cx['ref'], cx['prop'])
+                        rx = rx + resolve_ref(srvrow['franchises'], cx['ref'], cx['prop'])
                     locrow[dstkey] = rx
-                elif srckey == 'game_localizations':
-                    locrow[dstkey] = self.dataset.resolve_ref(srvrow[srckey], cx['ref'], cx['prop'])
-                    for x in locrow[dstkey]:
-                        x['region'] = self.dataset.resolve_ref(x['region'], 'regions', 'name')
-                elif srckey == 'age_ratings':
-                    locrow[dstkey] = self.dataset.resolve_ref(srvrow[srckey], cx['ref'], cx['prop'])
-                    for x in locrow[dstkey]:
-                        x['organization'] = self.dataset.resolve_ref(x['organization'], 'age_rating_organizations', 'name')
-                        x['rating'] = self.dataset.resolve_ref(x['rating'], 'age_rating_categories', 'rating')
-                        x['descriptions'] = self.dataset.resolve_ref(x['descriptions'], 'age_rating_content_descriptions', 'description')
-                elif srckey == 'videos':
-                    locrow[dstkey] = self.dataset.resolve_ref(srvrow[srckey], cx['ref'], cx['prop'])
-                    for x in locrow[dstkey]:
-                        x['url'] = 'https://www.youtube.com/watch?v=' + x['video_id']
-                        x.pop('video_id')
-                elif srckey == 'multiplayer_modes':
-                    mpdata = self.dataset.resolve_ref(srvrow[srckey], cx['ref'], cx['prop'])
-                    rx = []
-                    for x in mpdata:
-                        x['platform'] = self.dataset.resolve_ref(x['platform'], 'platforms', 'name')
-                        x.pop('id')
-                        x.pop('game')
-                        rem = []
-                        for key, val in x.items():
-                            if type(val) is NoneType:
-                                rem.append(key)
-                            elif type(val) is int and val == 0:
-                                rem.append(key)
-                        for key in rem:
-                            x.pop(key)
-                        rx.append(x)
-                    locrow[srckey] = rx
-                elif srckey == 'cover':
-                    imgurl = 'https:' + self.dataset.resolve_ref(srvrow[srckey], cx['ref'], cx['prop']).replace("/t_thumb/", "/t_original/")
-                    imgpath = f"{self.covers_dir}/cover_{locrow['slug']}_{locrow['id']}.jpg"
-                    locrow[srckey] = { 'path': imgpath, 'url': imgurl }
-                    if not os.path.exists(imgpath):
-                        download_file(imgpath, imgurl)
-                elif srckey == 'screenshots':
-                    locrow[srckey] = self._resolve_game_images(locrow['id'], srvrow[srckey], 'screenshots', self.screenshot_dir, 'screenshot', loadscreenshots)
-                elif srckey == 'artworks':
-                    locrow[srckey] = self._resolve_game_images(locrow['id'], srvrow[srckey], 'artworks', self.artwork_dir, 'artwork', loadartwork)
-                else:
-                    locrow[dstkey] = srvrow[srckey]
+                elif ctype == 'localizations':
+                    locrow[dstkey] = resolve_ref(srvrow[srckey], cx['ref'], cx['prop'], self._proc_game_localization)
+                elif ctype == 'ratings':
+                    ratings = [x for x in resolve_ref(srvrow[srckey], cx['ref'], cx['prop']) if x]
+                    self._prefetch_refs(ratings, IgdbSync.GAME_SUB_REFS['age_ratings'])
+                    locrow[dstkey] = self._proc_age_ratings(ratings)
+                elif ctype == 'videos':
+                    locrow[dstkey] = resolve_ref(srvrow[srckey], cx['ref'], cx['prop'], self._proc_game_video)
+                elif ctype == 'multiplayer':
+                    locrow[srckey] = resolve_ref(srvrow[srckey], cx['ref'], cx['prop'], self._proc_multiplayer_mode)
+                elif ctype == 'cover':
+                    if hascover and not self.dataset.get_table(cx['ref']).in_index(srvrow[srckey]):
+                        # Cover is already downloaded and its URL is not cached locally - skip the request
+                        locrow[srckey] = { 'path': covpath, 'url': None }
+                        continue
+                    imgurl = 'https:' + resolve_ref(srvrow[srckey], cx['ref'], cx['prop']).replace("/t_thumb/", "/t_original/")
+                    locrow[srckey] = { 'path': covpath, 'url': imgurl }
+                    if not hascover:
+                        dljobs.append((covpath, imgurl))
+                elif ctype == 'screenshots':
+                    locrow[srckey] = self._resolve_game_images(locrow['id'], srvrow[srckey], 'screenshots', self.screenshot_dir, 'screenshot', loadscreenshots, dljobs)
+                elif ctype == 'artworks':
+                    locrow[srckey] = self._resolve_game_images(locrow['id'], srvrow[srckey], 'artworks', self.artwork_dir, 'artwork', loadartwork, dljobs)
+
+            # Download cover, screenshots and artwork concurrently
+            self._download_images(dljobs)
         except Exception as e:
             Logger.error(f"Game data parsing failed, row ID {srvrow['id']}: {srvrow}. {e}")
             raise e
 
+    def _prefetch_game_refs(self, srvrows: list, schema: list):
+        """ Fetch missing references of the listed games concurrently (one batch per referenced table, indexed rows and downloaded covers are not fetched) """
+        refs = {}
+        for cx in schema:
+            tbl = cx.get('ref')
+            dt = self.dataset.get_table(tbl) if tbl else None
+            if dt is None:
+                continue
+            srckey = cx.get('field', cx['name'])
+            rows = [x for x in srvrows if not self._has_cover(x['id'])] if srckey == 'cover' else srvrows
+            ids = refs.setdefault(tbl, [])
+            for row in rows:
+                vx = row.get(srckey)
+                if type(vx) is list:
+                    ids.extend(y for y in vx if not dt.in_index(y))
+                elif type(vx) is int and not dt.in_index(vx):
+                    ids.append(vx)
+        jobs = [(tbl, ids) for tbl, ids in refs.items() if len(ids) > 0]
+        if len(jobs) == 0:
+            return
+        if len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=self.dataset.fetch_workers) as executor:
+                list(executor.map(lambda job: self.dataset.prefetch_refs(job[0], job[1]), jobs))
+        elif len(jobs) == 1:
+            self.dataset.prefetch_refs(jobs[0][0], jobs[0][1])
+
+    def _prefetch_game_subrefs(self, srvrows: list, schema: list):
+        """ Fetch missing references of the listed games' age ratings, localizations and multiplayer modes (one batch per referenced table) """
+        for cx in schema:
+            srckey = cx.get('field', cx['name'])
+            refs = IgdbSync.GAME_SUB_REFS.get(srckey)
+            dt = self.dataset.get_table(cx.get('ref', ''))
+            if refs is None or dt is None:
+                continue
+            rows = [dt.get_row(x) for row in srvrows for x in (row.get(srckey) or [])]
+            self._prefetch_refs([x for x in rows if x], refs)
+
+    def _prefetch_refs(self, rows: list, refs: dict):
+        """ Fetch missing references of the listed rows (one batch per referenced table, already resolved values are skipped) """
+        for key, tbl in refs.items():
+            ids = []
+            for row in rows:
+                vx = row.get(key)
+                if type(vx) is list:
+                    ids.extend(y for y in vx if type(y) is int)
+                elif type(vx) is int:
+                    ids.append(vx)
+            self.dataset.prefetch_refs(tbl, ids)
+
+    def _proc_release_date(self, x: dict) -> dict:
+        """ Process game release date entry """
+        ret = { 'date': x['human'] }
+        if 'release_region' in x:
+            ret['region'] = self._resolve_value(x['release_region'], 'release_date_regions', 'region')
+        if 'status' in x:
+            ret['status'] = self._resolve_value(x['status'], 'release_date_statuses', 'name')
+        if 'platform' in x:
+            ret['platform'] = self._resolve_value(x['platform'], 'platforms', 'name')
+        return ret
+
+    def _proc_game_localization(self, x: dict) -> dict:
+        """ Process game localization entry """
+        x['region'] = self._resolve_value(x['region'], 'regions', 'name')
+        return x
+
+    def _proc_age_ratings(self, ratings: list) -> list:
+        """ Process game age rating entries (references are resolved per property for all entries, entries with unknown organization / rating are skipped) """
+        orgs = self._resolve_values([x.get('organization') for x in ratings], 'age_rating_organizations', 'name')
+        vals = self._resolve_values([x.get('rating') for x in ratings], 'age_rating_categories', 'rating')
+        ret = []
+        for x, org, val in zip(ratings, orgs, vals):
+            if org is None or val is None:
+                continue
+            x['organization'] = org
+            x['rating'] = val
+            descs = x.get('descriptions')
+            x['descriptions'] = self._resolve_values(descs, 'age_rating_content_descriptions', 'description') if descs is not None else None
+            ret.append(x)
+        return ret
+
+    @staticmethod
+    def _proc_game_video(x: dict) -> dict:
+        """ Process game video entry """
+        x['url'] = 'https://www.youtube.com/watch?v=' + x.pop('video_id')
+        return x
+
+    def _proc_multiplayer_mode(self, x: dict) -> dict:
+        """ Process game multiplayer mode entry (empty / zero values are skipped) """
+        x['platform'] = self._resolve_value(x['platform'], 'platforms', 'name')
+        x.pop('id')
+        x.pop('game')
+        return {key: val for key, val in x.items() if val is not None and not (type(val) is int and val == 0)}
+
+    def _resolve_value(self, idx: int, tbl: str, prop: str):
+        """ Resolve single data table reference (resolved values are cached per table / property, unresolved references are retried) """
+        cache = self.ref_values.get((tbl, prop))
+        if cache is None:
+            cache = self.ref_values[(tbl, prop)] = {}
+        val = cache.get(idx)
+        if val is None:
+            val = self.dataset.resolve_ref(idx, tbl, prop)
+            if val is not None:
+                cache[idx] = val
+        return val
+
+    def _get_game_ref(self, gid: int) -> dict|None:
+        """ Get game reference entry (entries are cached until the games manifest is synced) """
+        ret = self.game_refs.get(gid)
+        if ret is None:
+            gameinf = self.games_manifest.get_row(gid)
+            if gameinf is None:
+                return None
+            ret = self.game_refs[gid] = { 'id': gid, 'name': gameinf['name'] }
+        return ret
+
+    def _resolve_values(self, ids: list, tbl: str, prop: str) -> list:
+        """ Resolve multiple data table references (shares the single reference cache, missing values are resolved in one batch) """
+        cache = self.ref_values.get((tbl, prop))
+        if cache is None:
+            cache = self.ref_values[(tbl, prop)] = {}
+        missing = [x for x in dict.fromkeys(ids) if x is not None and x not in cache]
+        if missing:
+            vals = self.dataset.resolve_ref(missing, tbl, prop)
+            if vals is not None:
+                cache.update((x, val) for x, val in zip(missing, vals) if val is not None)
+        return [cache.get(x) for x in ids]
+
+    def _find_ref_row(self, tbl: str, prop: str, val) -> dict|None:
+        """ Find data table row by property value (lookup map is built once per table / property) """
+        key = (tbl, prop)
+        if key not in self.ref_lookups:
+            lookup = {}
+            for row in self.dataset.get_table(tbl).data:
+                if prop in row:
+                    lookup.setdefault(row[prop], row)
+            self.ref_lookups[key] = lookup
+        return self.ref_lookups[key].get(val)
+
     def _resolve_game_ref(self, src: list|int) -> list|dict|None:
         """ Resolve game reference(s) """
         if type(src) is list:
-            ret = []
-            for xid in src:
-                if not self.games_manifest.in_index(xid):
-                    Logger.warning(f"Error resolving game reference {xid}")
-                    continue
-                ginf = { 'id': xid, 'name': self.games_manifest.get_row(xid)['name'] }
-                ret.append(ginf)
+            refs = [self._get_game_ref(xid) for xid in src]
+            ret = [x for x in refs if x is not None]
+            if len(ret) < len(src):
+                for xid, x in zip(src, refs):
+                    if x is None:
+                        Logger.warning(f"Error resolving game reference {xid}")
             return ret
         elif type(src) is int:
-            if not self.games_manifest.in_index(src):
+            ret = self._get_game_ref(src)
+            if ret is None:
                 Logger.warning(f"Error resolving game reference {src}")
-                return None
-            return { 'id': src, 'name': self.games_manifest.get_row(src)['name'] }
+            return ret
         else:
             return None
 
-    def _resolve_game_images(self, gid: int, imgids: list, dtable: str, imgdir: str, fpref: str, download: bool) -> list:
-        """ Resolve and download game related images """
-        rx = []
-        cnt = 1
+    def _resolve_game_images(self, gid: int, imgids: list, dtable: str, imgdir: str, fpref: str, download: bool, jobs: list|None = None) -> list:
+        """ Resolve and download game related images (missing images are only queued if the download job list is specified) """
+        imgpref = f"{imgdir}/{fpref}_{gid}_"
         imginfs = self.dataset.resolve_ref(imgids, dtable, 'url')
-        for imginf in imginfs:
-            imgurl = 'https:' + imginf.replace("/t_thumb/", "/t_original/")
-            imgpath = f"{imgdir}/{fpref}_{gid}_{cnt}.jpg"
-            rx.append({ 'path': imgpath, 'url': imgurl })
-            if download and not os.path.exists(imgpath):
-                download_file(imgpath, imgurl)
-            cnt += 1
+        rx = [{ 'path': f"{imgpref}{cnt}.jpg", 'url': 'https:' + imginf.replace("/t_thumb/", "/t_original/") } for cnt, imginf in enumerate(imginfs, 1)]
+        missing = [(x['path'], x['url']) for x in rx if not self._has_image(x['path'])] if download else []
+        if jobs is not None:
+            jobs.extend(missing)
+        else:
+            self._download_images(missing)
         return rx
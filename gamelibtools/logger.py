@@ -7,6 +7,7 @@
     :license: This software is licensed under the MIT license
     :license: See LICENSE.txt for full license information
 """
+import threading
 
 
 class Logger:
@@ -39,7 +40,8 @@ class Logger:
     proglevels = LVLMSG
     inprogmode = False
     prevmsg = ''
-    context = ''
+    threadctx = threading.local()
+    lock = threading.RLock()
     flog = None
 
     @staticmethod
@@ -51,21 +53,20 @@ class Logger:
         """
         if lvl not in Logger.LOGLVL:
             return
-        if Logger.flog:
-            Logger.flog.write(msg + '\n')
-        clvl = Logger.LOGLVL[lvl]
-        if Logger.loglevel < clvl or clvl <= 0 or clvl > Logger.LOGLVL[Logger.LVLDBG]:
-            return
-        backtok = ''
-        if Logger.inprogmode:
-            for i in range(len(Logger.prevmsg)):
-                backtok += '\b' + Logger.ENDC
-        if lvl in Logger.LOGCOL:
-            print(f"{backtok}{Logger.LOGCOL[lvl]}{Logger.context}{msg}{Logger.ENDC}")
-        else:
-            print(f"{backtok}{Logger.context}{msg}")
-        if Logger.inprogmode:
-            print(Logger.prevmsg,end='')
+        context = Logger.get_context()
+        with Logger.lock:
+            if Logger.flog:
+                Logger.flog.write(msg + '\n')
+            clvl = Logger.LOGLVL[lvl]
+            if Logger.loglevel < clvl or clvl <= 0 or clvl > Logger.LOGLVL[Logger.LVLDBG]:
+                return
+            backtok = ('\b' + Logger.ENDC) * len(Logger.prevmsg) if Logger.inprogmode else ''
+            if lvl in Logger.LOGCOL:
+                print(f"{backtok}{Logger.LOGCOL[lvl]}{context}{msg}{Logger.ENDC}")
+            else:
+                print(f"{backtok}{context}{msg}")
+            if Logger.inprogmode:
+                print(Logger.prevmsg,end='')
 
     @staticmethod
     def sysmsg(msg: str):
@@ -85,7 +86,13 @@ class Logger:
 
     @staticmethod
     def set_context(msg: str):
-        Logger.context = '' if msg == '' else msg + ' - '
+        """ Set message context (context is kept per thread) """
+        Logger.threadctx.context = '' if msg == '' else msg + ' - '
+
+    @staticmethod
+    def get_context() -> str:
+        """ Get message context of the current thread """
+        return getattr(Logger.threadctx, 'context', '')
 
     @staticmethod
     def clear_context():
@@ -101,20 +108,20 @@ class Logger:
         """
         if Logger.loglevel < Logger.proglevel:
             return
-        if not Logger.inprogmode:
-            Logger.inprogmode = True
-        if step >= total:
-            Logger.inprogmode = False
+        context = Logger.get_context()
+        with Logger.lock:
+            if not Logger.inprogmode:
+                Logger.inprogmode = True
+            if step >= total:
+                Logger.inprogmode = False
 
-        backtok = ''
-        for i in range(len(Logger.prevmsg)):
-            backtok += '\b'
-        endtok = '' if Logger.inprogmode else '\n'
-        proc = int(100.0 * float(step) / float(total)) if total > 0 else 0
+            backtok = '\b' * len(Logger.prevmsg)
+            endtok = '' if Logger.inprogmode else '\n'
+            proc = int(100.0 * float(step) / float(total)) if total > 0 else 0
 
-        txt = f"{Logger.PRGC}{backtok}{Logger.context}{msg} {step} / {total} ({proc}%)...{Logger.ENDC}"
-        Logger.prevmsg = txt
-        print(txt, end=endtok)
+            txt = f"{Logger.PRGC}{backtok}{context}{msg} {step} / {total} ({proc}%)...{Logger.ENDC}"
+            Logger.prevmsg = txt
+            print(txt, end=endtok)
 
     @staticmethod
     def open_flog(fname: str):
@@ -125,8 +132,9 @@ class Logger:
     def save_flog():
         """ Open file for logging """
         Logger.log('')
-        Logger.flog.close()
-        Logger.flog = None
+        with Logger.lock:
+            Logger.flog.close()
+            Logger.flog = None
 
     @staticmethod
     def set_level(lvl: str):
@@ -23,6 +23,7 @@ class PlatformInfo:
         'NTSC-U': ['NA', 'US'],
         'NTSC-J': ['JP', 'TW', 'KOR', 'KO', 'AS']
     }
+    REGION_CODES = {code: reg for reg, codes in REGIONS.items() for code in codes}
 
     def __init__(self):
         """ Class constructor """
@@ -46,7 +47,7 @@ class PlatformInfo:
         if len(data) < len(schema):
             Logger.warning(f"WARNING: Invalid field count: {len(data)}, expected {len(schema)} / {data[0] if len(data) > 0 else '-'}")
 
-        reg_code_codes = self._get_code_list()
+        reg_code_codes = PlatformInfo.REGION_CODES
         for i in range(0, len(data)):
             if schema[i].lower() == "title":
                 if data[i] == "":
@@ -202,19 +203,7 @@ class PlatformInfo:
 
     def _get_region_from_code(self, reg: str) -> str:
         """ Get region from a country/region code """
-        for x in PlatformInfo.REGIONS:
-            for y in PlatformInfo.REGIONS[x]:
-                if reg == y:
-                    return x
-        return ""
-
-    def _get_code_list(self) -> list:
-        """ Get a list of all country/region codes"""
-        ret = []
-        for x in PlatformInfo.REGIONS:
-            for y in PlatformInfo.REGIONS[x]:
-                ret.append(y)
-        return ret
+        return PlatformInfo.REGION_CODES.get(reg, "")
 
     def _parse_release_date(self, rdate: str, dreg: str='WW'):
         """
@@ -7,13 +7,74 @@
     :license: This software is licensed under the MIT license
     :license: See LICENSE.txt for full license information
 """
+import json
+import os
 import requests
+import threading
+import time
 import dateutil
+from concurrent.futures import ThreadPoolExecutor
 from zipfile import ZipFile
 from gamelibtools.logger import Logger
-from io import BytesIO
 from dateutil.parser import parser
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Shared HTTP session for file downloads (keep-alive connections are reused across downloads)
+download_session = None
+download_session_lock = threading.Lock()
+
+
+def json_loads(data: bytes|str):
+    """
+    Decode JSON document (uses orjson / ujson when available)
+    :param data: JSON document (raw bytes or text)
+    :return: Decoded object
+    """
+    if orjson:
+        return orjson.loads(data)
+    if ujson:
+        return ujson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, indent: int = 0) -> bytes:
+    """
+    Encode object as JSON document (uses orjson / ujson when available)
+    :param obj: Object to encode
+    :param indent: Indentation (orjson supports 2 spaces only, any positive value enables it)
+    :return: UTF-8 encoded JSON document
+    """
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent > 0 else 0))
+    if ujson:
+        return ujson.dumps(obj, indent=indent, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, indent=indent if indent > 0 else None, ensure_ascii=False).encode('utf-8')
+
+def load_json(fpath: str):
+    """
+    Load JSON file
+    :param fpath: File path
+    :return: Decoded object
+    """
+    with open(fpath, 'rb') as f:
+        return json_loads(f.read())
+
+def save_json(fpath: str, obj, indent: int = 4):
+    """
+    Save object to a JSON file (encoded directly to bytes)
+    :param fpath: File path
+    :param obj: Object to store
+    :param indent: Indentation (orjson uses 2 spaces)
+    """
+    with open(fpath, 'wb') as f:
+        f.write(json_dumps(obj, indent))
 
 def extract_html_content(uielem, splitarr: bool=True) -> str:
     """
@@ -114,26 +175,88 @@ def get_zip_uncompressed_size(fpath: str) -> int:
         Logger.error(f"An error occurred: {e}")
     return ret
 
+def get_download_session(maxconn: int = 32) -> requests.Session:
+    """
+    Get shared download session (created on first use)
+    :param maxconn: Max number of pooled connections per host
+    :return: HTTP session
+    """
+    global download_session
+    with download_session_lock:
+        if download_session is None:
+            download_session = requests.Session()
+            download_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=maxconn))
+            download_session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=maxconn))
+        return download_session
+
 def download_file(fpath: str, url: str) -> str|None:
     """ Download file """
     Logger.dbgmsg(f"Downloading file {fpath} from {url}...")
     try:
-        response = requests.get(url)
+        response = get_download_session().get(url, timeout=60)
         if response is None:
             return None
+        response.raise_for_status()
 
-        imgbytes = BytesIO(response.content)
         with open(fpath, 'wb') as f:
-            f.write(imgbytes.getbuffer())
+            f.write(response.content)
         return fpath
     except Exception as e:
         Logger.error(f"Downloading file {fpath} from {url} failed. {e}")
         return None
 
+def download_files(jobs: list, maxworkers: int = 8) -> list:
+    """
+    Download multiple files concurrently
+    :param jobs: List of (file path, URL) pairs
+    :param maxworkers: Max number of concurrent downloads
+    :return: Downloaded file paths (None for failed downloads)
+    """
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=maxworkers) as executor:
+        return list(executor.map(lambda job: download_file(job[0], job[1]), jobs))
+
+def list_files(dpath: str) -> set:
+    """
+    List file names in a directory (single directory scan instead of a stat call per file)
+    :param dpath: Directory path
+    :return: Set of file names (empty if directory doesn't exist)
+    """
+    if not os.path.isdir(dpath):
+        return set()
+    with os.scandir(dpath) as entries:
+        return {e.name for e in entries if e.is_file()}
+
+def format_timestamp(ts: int, withtime: bool = False) -> str:
+    """
+    Format Unix timestamp as a local date (YYYY-MM-DD) or date/time (YYYY-MM-DD HH:MM:SS) string
+    :param ts: Unix timestamp
+    :param withtime: Include time of the day
+    :return: Formatted date/time string
+    """
+    t = time.localtime(ts)
+    if withtime:
+        return '%04d-%02d-%02d %02d:%02d:%02d' % (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec)
+    return '%04d-%02d-%02d' % (t.tm_year, t.tm_mon, t.tm_mday)
+
+def where_id_in(ids: list) -> str:
+    """
+    Build IGDB query filter for a list of IDs
+    :param ids: Row IDs (up to 500 per request)
+    :return: Query filter
+    """
+    return 'where id = (' + ','.join(map(str, ids)) + ');'
+
 def extract_year(dtstr: str) -> int:
     """Extract year from a date/time string """
     if not dtstr or dtstr == '' or dtstr == 'TBD':
         return 0
+
+    # Fast path - IGDB dates end with the year ("2020", "Dec 2020", "Dec 31, 2020", "Q4 2020")
+    ylen = len(dtstr)
+    if ylen >= 4 and dtstr[-4:].isdigit() and (ylen == 4 or dtstr[-5] == ' '):
+        return int(dtstr[-4:])
     try:
         return dateutil.parser.parse(dtstr).year
     except Exception:
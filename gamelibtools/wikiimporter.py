@@ -7,7 +7,6 @@
     :license: This software is licensed under the MIT license
     :license: See LICENSE.txt for full license information
 """
-import json
 import os
 import requests
 import string
@@ -28,12 +27,11 @@ class WikiImporter:
         self.header_rows = 2
         self.letters = list(string.ascii_uppercase)
         self.letters.append('Numerical')
-        self.sources_map = json.load(open('config/wikisources.json'))
+        self.sources_map = load_json('config/wikisources.json')
 
     def run(self, selplatform: str=''):
         """ Import all data sources (defined platforms) """
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+        os.makedirs(self.data_dir, exist_ok=True)
         for platform, config in self.sources_map.items():
             if self.skip_existing and os.path.exists(self._get_file_path(platform)) and selplatform == '':
                 Logger.log(f"\nGame data for platform {platform} found, skipping platform")